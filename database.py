@@ -3,8 +3,13 @@ Database configuration and session management
 Using SQLModel with SQLite for persistent storage
 """
 
-from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import AsyncGenerator
+import asyncio
 import os
 
 # Import models to ensure they are registered with SQLModel
@@ -12,52 +17,135 @@ from models import Product, PriceHistory
 
 # Database file path
 DATABASE_FILE = "amazon_scraper.db"
-DATABASE_URL = f"sqlite:///{DATABASE_FILE}"
+DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_FILE}"
+
+# SQLite durability level. NORMAL is durable under WAL (only the last
+# commits before a power loss can be lost); OFF must be opted into explicitly
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+if SQLITE_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    SQLITE_SYNCHRONOUS = "NORMAL"
+
+# Log every SQL statement (development only, set SQL_ECHO=1 to enable)
+SQL_ECHO = os.getenv("SQL_ECHO", "").lower() in ("1", "true", "yes")
 
 # Create engine
-# connect_args={"check_same_thread": False} is needed for SQLite with FastAPI
-engine = create_engine(
+# The aiosqlite driver runs each connection in its own thread, so queries
+# never block the event loop. A small persistent pool keeps connections
+# (and their pragmas) open across requests instead of reopening the
+# database files for every session.
+# Sized for the async endpoints and bulk scrapes that hold sessions at the
+# same time on the event loop; pre-ping is unnecessary for a local
+# database file
+engine = create_async_engine(
     DATABASE_URL,
-    echo=True,  # Set to False in production
-    connect_args={"check_same_thread": False}
+    echo=SQL_ECHO,
+    query_cache_size=1200,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=False
+)
+
+# Objects stay loaded after commit; reloading expired attributes would
+# need an implicit query, which async sessions cannot run
+async_session = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False
 )
 
 
-def create_db_and_tables():
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Configure every new SQLite connection
+
+    WAL journaling lets readers (product/price history lookups) proceed
+    while a scrape is committing, and busy_timeout makes writers wait
+    for the lock instead of failing immediately with "database is locked".
+    The remaining pragmas avoid an fsync per commit and keep temporary
+    sorts and the page cache in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    cursor.execute("PRAGMA wal_autocheckpoint=1000")
+    cursor.close()
+
+
+def _create_schema(connection):
+    """Create tables and any indexes missing from existing tables"""
+    SQLModel.metadata.create_all(connection)
+
+    # create_all() only builds indexes together with new tables, so make sure
+    # indexes added later also exist in databases created before them, and
+    # rebuild any created by an older version with fewer columns
+    for index in PriceHistory.__table__.indexes:
+        existing_columns = connection.exec_driver_sql(
+            f'PRAGMA index_info("{index.name}")'
+        ).fetchall()
+        if existing_columns and len(existing_columns) != len(index.expressions):
+            index.drop(connection)
+        index.create(connection, checkfirst=True)
+
+
+async def create_db_and_tables():
     """
     Create all database tables if they don't exist
 
     This function should be called on application startup to ensure
     the database schema is properly initialized.
     """
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(_create_schema)
+
     print(f"✓ Database initialized: {DATABASE_FILE}")
 
 
-def get_session() -> Generator[Session, None, None]:
+async def optimize_database():
+    """
+    Refresh the query planner statistics
+
+    Runs SQLite's PRAGMA optimize, which only analyzes tables whose
+    statistics are out of date (a no-op most of the time). Keeps index
+    selection for the price history queries accurate as the table grows.
+    """
+    async with engine.begin() as connection:
+        await connection.execute(text("PRAGMA optimize"))
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function to get a database session
 
+    The session checks out a pooled connection, so the per-connection
+    pragmas are not re-run on every request.
+
     Yields:
-        Session: SQLModel database session
+        AsyncSession: SQLModel async database session
 
     Usage in FastAPI:
         @app.get("/items/")
-        def read_items(session: Session = Depends(get_session)):
+        async def read_items(session: AsyncSession = Depends(get_session)):
             ...
     """
-    with Session(engine) as session:
+    async with async_session() as session:
         yield session
 
 
-def drop_all_tables():
+async def drop_all_tables():
     """
     Drop all tables - USE WITH CAUTION!
 
     This function is useful for development/testing to reset the database.
     Should not be used in production.
     """
-    SQLModel.metadata.drop_all(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
     print("⚠ All tables dropped")
 
 
@@ -83,7 +171,7 @@ def get_db_info():
 if __name__ == "__main__":
     # When run directly, create the database tables
     print("Creating database tables...")
-    create_db_and_tables()
+    asyncio.run(create_db_and_tables())
     print("\nDatabase info:")
     info = get_db_info()
     for key, value in info.items():
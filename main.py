@@ -4,29 +4,91 @@ FastAPI Server for Amazon Price Scraper
 API endpoints for scraping Amazon product information
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional
+from typing import List, Optional
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import functools
+import logging
+from contextlib import asynccontextmanager
 import re
-from datetime import datetime
-from sqlmodel import Session, select
+from urllib.parse import urlsplit
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import bindparam, case, func, literal_column, tuple_
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.sqlite import insert
+from cachetools import TTLCache
 
 # Import scraper factory
-from scrapers import get_scraper_function, get_supported_stores, search_amazon, search_mercadolibre
+from scrapers import get_scraper_function, get_batch_scraper_function, get_supported_stores, search_amazon, search_mercadolibre, close_browser, close_http_client
 
 # Import database models and functions
-from database import create_db_and_tables, get_session
-from models import Product, PriceHistory, ProductReadWithHistory, PriceHistoryRead
+from database import async_session, create_db_and_tables, get_session, optimize_database
+from models import Product, PriceHistory, ProductReadWithHistory
+
+log = logging.getLogger(__name__)
+
+# Seconds between PRAGMA optimize runs
+OPTIMIZE_INTERVAL = 900
+
+
+async def periodic_optimize():
+    """Keep SQLite planner statistics fresh while the server is running"""
+    while True:
+        await asyncio.sleep(OPTIMIZE_INTERVAL)
+        try:
+            await optimize_database()
+        except Exception as e:
+            log.error("Database optimize error: %s", e)
+
+
+async def warm_up_database():
+    """
+    Run the request queries once before serving traffic
+
+    Opens a pooled connection (applying its pragmas), loads the schema and
+    first pages into SQLite's cache, and compiles the module-level
+    statements so the first real request doesn't pay for any of it.
+    """
+    async with async_session() as session:
+        (await session.exec(PRODUCT_BY_ID, params={"product_id": 0})).all()
+        (await session.exec(
+            PRICE_HISTORY_BY_PRODUCT,
+            params={"product_id": 0, "limit": PRICE_HISTORY_PAGE_SIZE, "offset": 0}
+        )).all()
+        (await session.exec(
+            PRICE_HISTORY_BY_PRODUCT_BEFORE,
+            params={"product_id": 0, "before_id": 0, "limit": PRICE_HISTORY_PAGE_SIZE, "offset": 0}
+        )).all()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the database on startup; stop background tasks and shared scraper clients on shutdown"""
+    await create_db_and_tables()
+    await optimize_database()
+    await warm_up_database()
+    optimize_task = asyncio.create_task(periodic_optimize())
+
+    yield
+
+    optimize_task.cancel()
+    await close_browser()
+    await close_http_client()
+
 
 # Create FastAPI app instance
 app = FastAPI(
     title="Multi-Store Price Scraper API",
     description="API for scraping product information from multiple online stores",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
+    # orjson serializes the price history lists (and their datetimes)
+    # several times faster than the standard json module
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -38,15 +100,107 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Thread pool for running blocking scraper operations
-executor = ThreadPoolExecutor(max_workers=3)
-
+# Scrapes in flight, keyed by scrape_key(), so duplicate concurrent
+# requests share one scrape instead of each launching their own
+_inflight_scrapes = {}
+
+# Recently scraped data, reused for requests within SCRAPE_CACHE_TTL seconds
+SCRAPE_CACHE_TTL = 30
+_scrape_cache = TTLCache(maxsize=512, ttl=SCRAPE_CACHE_TTL)
+
+# Serialized GET /api/product responses, keyed by (product ID, product
+# version, limit, offset, before_id) and bounded by their total size in
+# bytes. A scrape that writes to a product bumps its version, which makes
+# the older entries unreachable until they expire, so the TTL only bounds
+# staleness from other writers.
+PRODUCT_CACHE_TTL = 30
+PRODUCT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+_product_cache = TTLCache(maxsize=PRODUCT_CACHE_MAX_BYTES, ttl=PRODUCT_CACHE_TTL, getsizeof=len)
+# Version of each product written since startup (missing means 0)
+_product_versions = {}
+
+# Limits for /api/scrape/bulk: URLs per request and scrapes run at once
+BULK_SCRAPE_MAX_URLS = 50
+BULK_SCRAPE_CONCURRENCY = 10
+
+# Name stored for products whose title could not be scraped
+UNKNOWN_PRODUCT_NAME = "Unknown Product"
+
+# Queries built once so SQLAlchemy's compiled cache is reused across requests
+PRODUCT_BY_ID = select(Product).where(Product.id == bindparam("product_id"))
+PRICE_HISTORY_BY_PRODUCT = select(PriceHistory).where(
+    PriceHistory.product_id == bindparam("product_id")
+).order_by(
+    PriceHistory.timestamp.desc(), PriceHistory.id.desc()
+).limit(bindparam("limit")).offset(bindparam("offset"))
+
+# Keyset variant: entries after a given entry in the same ordering. The
+# cursor is that entry's (timestamp, id), looked up by primary key, which
+# lets SQLite seek straight to it in ix_price_history_product_ts instead of
+# walking every newer row the way a large OFFSET does.
+_cursor_entry = aliased(PriceHistory)
+PRICE_HISTORY_BY_PRODUCT_BEFORE = select(PriceHistory).where(
+    PriceHistory.product_id == bindparam("product_id"),
+    tuple_(PriceHistory.timestamp, PriceHistory.id) < tuple_(
+        select(_cursor_entry.timestamp).where(
+            _cursor_entry.id == bindparam("before_id")
+        ).scalar_subquery(),
+        bindparam("before_id")
+    )
+).order_by(
+    PriceHistory.timestamp.desc(), PriceHistory.id.desc()
+).limit(bindparam("limit")).offset(bindparam("offset"))
+
+# Page size for GET /api/product/{product_id} price history
+PRICE_HISTORY_PAGE_SIZE = 100
+PRICE_HISTORY_MAX_PAGE_SIZE = 1000
+
+# Number of most recent price history entries returned by /api/scrape
+SCRAPE_HISTORY_LIMIT = 50
+
+# Whether a product already has price history, for the upsert's RETURNING
+# clause. SQLAlchemy renders RETURNING columns unqualified, so the row being
+# upserted is referenced by table name to correlate the subquery.
+PRODUCT_HAS_HISTORY = select(PriceHistory.id).where(
+    PriceHistory.product_id == literal_column(f"{Product.__tablename__}.id")
+).exists()
+
+# Precompiled patterns used on every scrape
+# Amazon product paths: /dp/, /gp/product/, mobile /gp/aw/d/ and the
+# legacy /exec/obidos/ASIN/ form, each followed by the 10-character ASIN
+_AMAZON_DP = re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/ASIN)/([A-Z0-9]{10})')
+_ML_ID = re.compile(r'(ML[A-Z]-?\d+)')
+_PRICE_CLEAN = re.compile(r'[^\d.]')
+
+# URLs already in this form need no simplification
+_AMAZON_CANONICAL_PREFIX = "https://www.amazon.com/dp/"
+_ASIN_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Store names keyed by host (without "www."); subdomains match by suffix
+_HOST_TO_STORE = {
+    'amazon.com': "Amazon.com",
+    'amazon.es': "Amazon.es",
+    'amazon.co.uk': "Amazon.co.uk",
+    'mercadolibre.com.mx': "MercadoLibre México",
+    'mercadolibre.com.ar': "MercadoLibre Argentina",
+    'mercadolibre.com.co': "MercadoLibre Colombia",
+    'mercadolibre.com.br': "MercadoLibre Brasil",
+    'mercadolivre.com.br': "MercadoLibre Brasil",
+    # Add more store detection here as needed
+}
+
+# Generic store names for hosts not listed above (e.g. amazon.de)
+_HOST_BRANDS = (
+    ('amazon.', "Amazon"),
+    ('mercadolibre.', "MercadoLibre"),
+)
 
-# Startup event to create database tables
-@app.on_event("startup")
-def on_startup():
-    """Initialize database on application startup"""
-    create_db_and_tables()
+# MercadoLibre regional sites, keyed by the domain fragment found in the URL
+_ML_REGION_URLS = {
+    'mercadolibre.com.mx': "https://www.mercadolibre.com.mx",
+    'mercadolibre.com.ar': "https://www.mercadolibre.com.ar",
+    'mercadolibre.com.co': "https://www.mercadolibre.com.co",
+}
 
 
 # Helper functions
@@ -65,45 +219,249 @@ def parse_price(price_str: Optional[str]) -> Optional[float]:
 
     try:
         # Remove currency symbols and commas
-        cleaned = re.sub(r'[^\d.]', '', price_str)
+        cleaned = _PRICE_CLEAN.sub('', price_str)
         return float(cleaned)
     except (ValueError, AttributeError):
         return None
 
 
+@functools.lru_cache(maxsize=4096)
+def extract_product_id(url: str) -> Optional[str]:
+    """
+    Extract the store product ID (Amazon ASIN or MercadoLibre item ID)
+
+    Args:
+        url: Product URL
+
+    Returns:
+        The product ID, or None if the URL doesn't contain one
+    """
+    match = _AMAZON_DP.search(url) or _ML_ID.search(url)
+    return match.group(1) if match else None
+
+
+@functools.lru_cache(maxsize=4096)
 def simplify_url(url: str) -> str:
     """
     Simplify product URL by removing tracking parameters
 
+    Results are memoized, since clients re-scrape the same URLs and the
+    URL is simplified more than once per request.
+
     Args:
         url: Full product URL with parameters
 
     Returns:
         Simplified URL with just the product ID
     """
+    # Already simplified: skip the regex searches
+    if url.startswith(_AMAZON_CANONICAL_PREFIX):
+        product_id = url[len(_AMAZON_CANONICAL_PREFIX):]
+        if product_id and not product_id.strip(_ASIN_CHARS):
+            return url
+
     # Amazon: Extract product ID from URL
-    amazon_match = re.search(r'/dp/([A-Z0-9]+)', url)
+    amazon_match = _AMAZON_DP.search(url)
     if amazon_match:
         product_id = amazon_match.group(1)
         return f"https://www.amazon.com/dp/{product_id}"
 
     # MercadoLibre: Extract product ID (format: MLM1234567890, MLA1234567890, etc.)
-    mercadolibre_match = re.search(r'(ML[A-Z]-?\d+)', url)
+    mercadolibre_match = _ML_ID.search(url)
     if mercadolibre_match:
         product_id = mercadolibre_match.group(1)
-        # Detect region from URL
-        if 'mercadolibre.com.mx' in url.lower():
-            return f"https://www.mercadolibre.com.mx/item/{product_id}"
-        elif 'mercadolibre.com.ar' in url.lower():
-            return f"https://www.mercadolibre.com.ar/item/{product_id}"
-        elif 'mercadolibre.com.co' in url.lower():
-            return f"https://www.mercadolibre.com.co/item/{product_id}"
-        else:
-            return f"https://www.mercadolibre.com/item/{product_id}"
+        # Detect region from the URL host
+        host = get_url_host(url)
+        base = next(
+            (site for domain, site in _ML_REGION_URLS.items() if _host_matches(host, domain)),
+            "https://www.mercadolibre.com"
+        )
+        return f"{base}/item/{product_id}"
 
     return url
 
 
+def has_scraped_data(scraped_data: dict) -> bool:
+    """Check whether a scraper extracted at least one product field"""
+    return any([
+        scraped_data.get('title'),
+        scraped_data.get('price'),
+        scraped_data.get('image_url')
+    ])
+
+
+def scrape_key(url: str) -> tuple:
+    """
+    Key identifying what a scrape of url returns, for sharing scrapes
+
+    Includes the host because simplify_url() maps every Amazon storefront
+    to amazon.com, while prices differ between amazon.com and amazon.es.
+
+    Args:
+        url: Product URL
+
+    Returns:
+        (host, product ID), or (host, simplified URL) if there is no ID
+    """
+    return (get_url_host(url), extract_product_id(url) or simplify_url(url))
+
+
+async def run_scraper(scraper_function, url: str) -> dict:
+    """
+    Run a scraper, coalescing duplicate requests
+
+    Requests for the same product on the same storefront (same
+    scrape_key()) made while a scrape is running wait for that scrape
+    instead of starting a new one, and successful results are reused for
+    SCRAPE_CACHE_TTL seconds.
+
+    Args:
+        scraper_function: Store scraper returned by get_scraper_function()
+        url: Product URL to scrape
+
+    Returns:
+        A copy of the scraped data dictionary, safe for the caller to modify
+    """
+    key = scrape_key(url)
+
+    cached = _scrape_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
+    future = _inflight_scrapes.get(key)
+    if future is None:
+        future = asyncio.ensure_future(scraper_function(url))
+        _inflight_scrapes[key] = future
+        future.add_done_callback(lambda _: _inflight_scrapes.pop(key, None))
+
+    # Shielded so a disconnecting client doesn't cancel the scrape for
+    # everyone else waiting on it
+    scraped_data = await asyncio.shield(future)
+
+    if has_scraped_data(scraped_data):
+        _scrape_cache[key] = scraped_data
+
+    return dict(scraped_data)
+
+
+async def run_batch_scraper(batch_function, urls: List[str]) -> list:
+    """
+    Run a batch scraper over several URLs of one store, coalescing like run_scraper
+
+    Cached results and scrapes already in flight (from any request) are
+    reused; the remaining URLs go to batch_function in a single call, and
+    are registered as in flight so concurrent requests wait for the batch.
+
+    Args:
+        batch_function: Store batch scraper returned by get_batch_scraper_function()
+        urls: Product URLs of that store
+
+    Returns:
+        Per URL, in order: a copy of the scraped data dictionary, or the
+        exception the scrape failed with
+    """
+    keys = [scrape_key(url) for url in urls]
+
+    cached = {}
+    pending = {}
+    new_urls = {}
+    for url, key in zip(urls, keys):
+        if key in cached or key in pending or key in new_urls:
+            continue
+        if key in _scrape_cache:
+            cached[key] = _scrape_cache[key]
+        elif key in _inflight_scrapes:
+            pending[key] = _inflight_scrapes[key]
+        else:
+            new_urls[key] = url
+
+    if new_urls:
+        loop = asyncio.get_running_loop()
+        new_futures = {key: loop.create_future() for key in new_urls}
+        _inflight_scrapes.update(new_futures)
+        pending.update(new_futures)
+
+        def settle(batch):
+            # Hand each URL's result (or the batch's failure) to its future
+            for i, (key, future) in enumerate(new_futures.items()):
+                _inflight_scrapes.pop(key, None)
+                if batch.cancelled():
+                    future.cancel()
+                elif batch.exception() is not None:
+                    future.set_exception(batch.exception())
+                else:
+                    future.set_result(batch.result()[i])
+
+        batch = asyncio.ensure_future(batch_function(list(new_urls.values())))
+        batch.add_done_callback(settle)
+
+    # Shielded so a disconnecting client doesn't cancel the scrapes for
+    # everyone else waiting on them
+    outcomes = await asyncio.gather(
+        *(asyncio.shield(future) for future in pending.values()),
+        return_exceptions=True
+    )
+
+    scraped = dict(cached)
+    for key, outcome in zip(pending, outcomes):
+        if not isinstance(outcome, BaseException) and has_scraped_data(outcome):
+            _scrape_cache[key] = outcome
+        scraped[key] = outcome
+
+    return [
+        scraped[key] if isinstance(scraped[key], BaseException) else dict(scraped[key])
+        for key in keys
+    ]
+
+
+def invalidate_product_cache(*product_ids: int) -> None:
+    """Drop cached GET /api/product responses after their products changed"""
+    for product_id in product_ids:
+        _product_versions[product_id] = _product_versions.get(product_id, 0) + 1
+
+
+def get_url_host(url: str) -> str:
+    """
+    Extract the lowercased host of a URL without the "www." prefix
+
+    Args:
+        url: Any URL
+
+    Returns:
+        Host like "amazon.com" or "articulo.mercadolibre.com.mx", or "" if missing
+    """
+    host = (urlsplit(url).hostname or "").lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def _host_matches(host: str, domain: str) -> bool:
+    """Check whether host is domain itself or one of its subdomains"""
+    return host == domain or host.endswith('.' + domain)
+
+
+def detect_store_name(host: str) -> str:
+    """
+    Detect the store/marketplace name from a URL host
+
+    Args:
+        host: URL host as returned by get_url_host()
+
+    Returns:
+        Store name like "Amazon.com" or "MercadoLibre México", or "Unknown Store"
+    """
+    store_name = _HOST_TO_STORE.get(host)
+    if store_name:
+        return store_name
+
+    for domain, name in _HOST_TO_STORE.items():
+        if host.endswith('.' + domain):
+            return name
+
+    return next((name for brand, name in _HOST_BRANDS if brand in host), "Unknown Store")
+
+
 # Pydantic models for request/response
 class ScrapeRequest(BaseModel):
     """Request model for scraping endpoint"""
@@ -139,6 +497,31 @@ class ScrapeResponse(BaseModel):
         }
 
 
+class BulkScrapeRequest(BaseModel):
+    """Request model for bulk scraping endpoint"""
+    urls: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=BULK_SCRAPE_MAX_URLS,
+        description="Product URLs to scrape from supported stores"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "urls": [
+                    "https://www.amazon.com/dp/B07RJ18VMF",
+                    "https://articulo.mercadolibre.com.mx/MLM-1234567890"
+                ]
+            }
+        }
+
+
+class BulkScrapeResponse(BaseModel):
+    """Response model for bulk scraping endpoint"""
+    results: List[ScrapeResponse] = Field(..., description="One result per requested URL, in request order")
+
+
 @app.get("/")
 async def root():
     """
@@ -171,7 +554,7 @@ async def health_check():
 
 
 @app.post("/api/scrape", response_model=ScrapeResponse)
-async def scrape_product(request: ScrapeRequest, session: Session = Depends(get_session)):
+async def scrape_product(request: ScrapeRequest):
     """
     Scrape product information from supported stores and save to database
 
@@ -180,13 +563,12 @@ async def scrape_product(request: ScrapeRequest, session: Session = Depends(get_
 
     Args:
         request: ScrapeRequest object containing the URL to scrape
-        session: Database session (injected by FastAPI)
 
     Returns:
         ScrapeResponse: Object containing the scraped data or error information
 
     Raises:
-        HTTPException: If the store is not supported or scraping fails critically
+        HTTPException: 400 if the store is not supported, 422 if the URL has no product ID
     """
     # Get the appropriate scraper function for this URL
     scraper_function = get_scraper_function(request.url)
@@ -198,23 +580,19 @@ async def scrape_product(request: ScrapeRequest, session: Session = Depends(get_
             detail=f"Tienda no soportada. Tiendas soportadas: {', '.join(supported_stores)}"
         )
 
-    try:
-        # Run the blocking scraper function in a thread pool
-        loop = asyncio.get_event_loop()
-        scraped_data = await loop.run_in_executor(
-            executor,
-            scraper_function,
-            request.url
+    # Reject URLs without a product ID before they occupy a scraper worker
+    if extract_product_id(request.url) is None:
+        raise HTTPException(
+            status_code=422,
+            detail="URL does not contain a product ID"
         )
 
-        # Check if any data was scraped
-        has_data = any([
-            scraped_data.get('title'),
-            scraped_data.get('price'),
-            scraped_data.get('image_url')
-        ])
+    try:
+        # Run the scraper (coalesced with identical in-flight requests)
+        scraped_data = await run_scraper(scraper_function, request.url)
 
-        if not has_data:
+        # Check if any data was scraped
+        if not has_scraped_data(scraped_data):
             return ScrapeResponse(
                 success=False,
                 url=request.url,
@@ -227,85 +605,70 @@ async def scrape_product(request: ScrapeRequest, session: Session = Depends(get_
             # Simplify URL for consistent storage
             base_url = simplify_url(request.url)
 
-            # Check if product already exists
-            statement = select(Product).where(Product.base_url == base_url)
-            existing_product = session.exec(statement).first()
-
-            if existing_product:
-                # Update existing product
-                existing_product.name = scraped_data.get('title') or existing_product.name
-                existing_product.updated_at = datetime.utcnow()
-                product = existing_product
-            else:
-                # Create new product
-                product = Product(
-                    name=scraped_data.get('title') or "Unknown Product",
-                    base_url=base_url
-                )
-                session.add(product)
-
-            session.commit()
-            session.refresh(product)
-
             # Detect store name from URL
-            store_name = "Unknown Store"
-            url_lower = request.url.lower()
-            if 'amazon.com' in url_lower:
-                store_name = "Amazon.com"
-            elif 'amazon.es' in url_lower:
-                store_name = "Amazon.es"
-            elif 'amazon.co.uk' in url_lower:
-                store_name = "Amazon.co.uk"
-            elif 'amazon' in url_lower:
-                store_name = "Amazon"
-            elif 'mercadolibre.com.mx' in url_lower:
-                store_name = "MercadoLibre México"
-            elif 'mercadolibre.com.ar' in url_lower:
-                store_name = "MercadoLibre Argentina"
-            elif 'mercadolibre.com.co' in url_lower:
-                store_name = "MercadoLibre Colombia"
-            elif 'mercadolibre.com.br' in url_lower or 'mercadolivre.com.br' in url_lower:
-                store_name = "MercadoLibre Brasil"
-            elif 'mercadolibre' in url_lower:
-                store_name = "MercadoLibre"
-            # Add more store detection here as needed
-
-            # Parse and save price history
+            store_name = detect_store_name(get_url_host(request.url))
+
             price_float = parse_price(scraped_data.get('price'))
-            if price_float is not None:
-                price_history = PriceHistory(
-                    product_id=product.id,
-                    store_name=store_name,
-                    price=price_float
-                )
-                session.add(price_history)
-                session.commit()
-
-            # Add database info to response
-            scraped_data['product_id'] = product.id
-            scraped_data['saved_to_database'] = True
-
-            # Fetch complete price history for this product
-            price_statement = select(PriceHistory).where(
-                PriceHistory.product_id == product.id
-            ).order_by(PriceHistory.timestamp.desc())
-            price_history = session.exec(price_statement).all()
-
-            # Convert to list of dicts for JSON response
-            scraped_data['price_history'] = [
-                {
-                    'id': ph.id,
-                    'product_id': ph.product_id,
-                    'store_name': ph.store_name,
-                    'price': ph.price,
-                    'timestamp': ph.timestamp.isoformat()
-                }
-                for ph in price_history
-            ]
+
+            # Open the session only now that the scrape is done, so the
+            # connection and write transaction are held for milliseconds.
+            # Objects stay loaded after commit (expire_on_commit=False) so the
+            # new price history row can be returned without reloading it.
+            async with async_session() as session:
+                # Product upsert and price history insert share a single transaction
+                async with session.begin():
+                    # Insert the product or update the existing one in a single
+                    # statement (INSERT ... ON CONFLICT(base_url) DO UPDATE),
+                    # also returning whether it already had price history
+                    title = scraped_data.get('title')
+                    on_conflict_set = {'updated_at': func.now()}
+                    if title:
+                        on_conflict_set['name'] = title
+
+                    upsert_statement = insert(Product).values(
+                        name=title or UNKNOWN_PRODUCT_NAME,
+                        base_url=base_url
+                    ).on_conflict_do_update(
+                        index_elements=[Product.base_url],
+                        set_=on_conflict_set
+                    ).returning(
+                        Product.id,
+                        PRODUCT_HAS_HISTORY
+                    )
+                    product_id, had_history = (await session.exec(upsert_statement)).one()
+
+                    # Save price history
+                    price_history = None
+                    if price_float is not None:
+                        price_history = PriceHistory(
+                            product_id=product_id,
+                            store_name=store_name,
+                            price=price_float
+                        )
+                        session.add(price_history)
+
+                invalidate_product_cache(product_id)
+
+                # Add database info to response
+                scraped_data['product_id'] = product_id
+                scraped_data['saved_to_database'] = True
+
+                if had_history:
+                    # Fetch the most recent price history for this product
+                    recent_history = (await session.exec(
+                        PRICE_HISTORY_BY_PRODUCT,
+                        params={"product_id": product_id, "limit": SCRAPE_HISTORY_LIMIT, "offset": 0}
+                    )).all()
+                else:
+                    # No earlier rows: the history is at most the row just added
+                    recent_history = [price_history] if price_history is not None else []
+
+                # Serialized by the response model together with the rest of the data
+                scraped_data['price_history'] = recent_history
 
         except Exception as db_error:
             # If database save fails, log it but still return scraped data
-            print(f"Database error: {db_error}")
+            log.error("Database error: %s", db_error)
             scraped_data['saved_to_database'] = False
             scraped_data['database_error'] = str(db_error)
 
@@ -325,27 +688,208 @@ async def scrape_product(request: ScrapeRequest, session: Session = Depends(get_
         )
 
 
+async def save_bulk_scrapes(scrapes: List[tuple]) -> None:
+    """
+    Save the products and prices from several scrapes in one transaction
+
+    All products are upserted with a single multi-row INSERT ... ON CONFLICT
+    statement and all price history rows with a single multi-row INSERT, so
+    the batch costs two statements and one commit. Each scraped data dict
+    gets its product_id.
+
+    Args:
+        scrapes: (url, scraped_data) pairs with at least one field scraped
+    """
+    # One row per product; the last scrape of a repeated product wins
+    product_rows = {}
+    for url, scraped_data in scrapes:
+        base_url = simplify_url(url)
+        product_rows[base_url] = {
+            'name': scraped_data.get('title') or UNKNOWN_PRODUCT_NAME,
+            'base_url': base_url
+        }
+
+    upsert_statement = insert(Product).values(list(product_rows.values()))
+    upsert_statement = upsert_statement.on_conflict_do_update(
+        index_elements=[Product.base_url],
+        set_={
+            'updated_at': func.now(),
+            # Keep the stored name when this scrape found no title
+            'name': case(
+                (upsert_statement.excluded.name == UNKNOWN_PRODUCT_NAME, Product.name),
+                else_=upsert_statement.excluded.name
+            )
+        }
+    ).returning(Product.id, Product.base_url)
+
+    async with async_session() as session:
+        async with session.begin():
+            product_ids = {
+                base_url: product_id
+                for product_id, base_url in (await session.exec(upsert_statement)).all()
+            }
+
+            price_rows = []
+            for url, scraped_data in scrapes:
+                price_float = parse_price(scraped_data.get('price'))
+                if price_float is not None:
+                    price_rows.append({
+                        'product_id': product_ids[simplify_url(url)],
+                        'store_name': detect_store_name(get_url_host(url)),
+                        'price': price_float
+                    })
+
+            if price_rows:
+                await session.exec(insert(PriceHistory).values(price_rows))
+
+    invalidate_product_cache(*product_ids.values())
+
+    for url, scraped_data in scrapes:
+        scraped_data['product_id'] = product_ids[simplify_url(url)]
+
+
+@app.post("/api/scrape/bulk", response_model=BulkScrapeResponse)
+async def scrape_products_bulk(request: BulkScrapeRequest):
+    """
+    Scrape several product URLs concurrently and save them to the database
+
+    Up to BULK_SCRAPE_CONCURRENCY scrapes run at once. URLs of stores with
+    a batch scraper (MercadoLibre) are scraped together in one batch per
+    store, sharing a browser context. Successful results are saved in a
+    single transaction. Each result has the same shape as
+    /api/scrape, without price_history (use GET /api/product/{product_id}).
+
+    Args:
+        request: BulkScrapeRequest containing the product URLs
+
+    Returns:
+        BulkScrapeResponse: One ScrapeResponse per URL, in request order
+    """
+    semaphore = asyncio.Semaphore(BULK_SCRAPE_CONCURRENCY)
+
+    outcomes = [None] * len(request.urls)
+    single_scrapes = []
+    batches = {}
+    for i, url in enumerate(request.urls):
+        scraper_function = get_scraper_function(url)
+        if scraper_function is None:
+            outcomes[i] = ValueError(f"Tienda no soportada. Tiendas soportadas: {', '.join(get_supported_stores())}")
+        elif extract_product_id(url) is None:
+            outcomes[i] = ValueError("URL does not contain a product ID")
+        else:
+            batch_function = get_batch_scraper_function(url)
+            if batch_function is not None:
+                batches.setdefault(batch_function, []).append(i)
+            else:
+                single_scrapes.append((i, scraper_function))
+
+    async def scrape(i: int, scraper_function) -> None:
+        async with semaphore:
+            try:
+                outcomes[i] = await run_scraper(scraper_function, request.urls[i])
+            except Exception as e:
+                outcomes[i] = e
+
+    async def scrape_batch(batch_function, indices: List[int]) -> None:
+        batch_outcomes = await run_batch_scraper(batch_function, [request.urls[i] for i in indices])
+        for i, outcome in zip(indices, batch_outcomes):
+            outcomes[i] = outcome
+
+    await asyncio.gather(
+        *(scrape(i, scraper_function) for i, scraper_function in single_scrapes),
+        *(scrape_batch(batch_function, indices) for batch_function, indices in batches.items())
+    )
+
+    scraped = [
+        (url, outcome) for url, outcome in zip(request.urls, outcomes)
+        if not isinstance(outcome, Exception) and has_scraped_data(outcome)
+    ]
+
+    if scraped:
+        try:
+            await save_bulk_scrapes(scraped)
+            saved, database_error = True, None
+        except Exception as db_error:
+            # If database save fails, log it but still return scraped data
+            log.error("Database error: %s", db_error)
+            saved, database_error = False, str(db_error)
+
+        for _, scraped_data in scraped:
+            scraped_data['saved_to_database'] = saved
+            if database_error is not None:
+                scraped_data['database_error'] = database_error
+
+    results = []
+    for url, outcome in zip(request.urls, outcomes):
+        if isinstance(outcome, Exception):
+            results.append(ScrapeResponse(
+                success=False,
+                url=url,
+                data=None,
+                error=f"Scraping failed: {str(outcome)}"
+            ))
+        elif not has_scraped_data(outcome):
+            results.append(ScrapeResponse(
+                success=False,
+                url=url,
+                data=outcome,
+                error="No data could be extracted from the page. The page might be blocked or the URL is invalid."
+            ))
+        else:
+            results.append(ScrapeResponse(success=True, url=url, data=outcome, error=None))
+
+    return BulkScrapeResponse(results=results)
+
+
 @app.get("/api/product/{product_id}", response_model=ProductReadWithHistory)
-async def get_product(product_id: int, session: Session = Depends(get_session)):
+async def get_product(
+    product_id: int,
+    limit: int = Query(
+        PRICE_HISTORY_PAGE_SIZE, ge=1, le=PRICE_HISTORY_MAX_PAGE_SIZE,
+        description="Maximum number of price history entries to return"
+    ),
+    offset: int = Query(0, ge=0, description="Number of price history entries to skip"),
+    before_id: Optional[int] = Query(
+        None, ge=1,
+        description="Only return price history entries after this entry (newest first), e.g. the last one received"
+    ),
+    session: AsyncSession = Depends(get_session)
+):
     """
     Get product information with price history
 
-    Retrieves a product by ID including all its price history entries,
-    sorted by timestamp (newest first).
+    Retrieves a product by ID including one page of its price history
+    entries, sorted by timestamp (newest first). Responses are cached for
+    PRODUCT_CACHE_TTL seconds, or until the product is scraped again.
+
+    To page through a long history, either increase offset or pass the
+    id of the last entry received as before_id. before_id seeks directly
+    to that entry, so its cost does not grow with depth like offset's.
 
     Args:
         product_id: The product ID to retrieve
+        limit: Maximum number of price history entries to return
+        offset: Number of price history entries to skip
+        before_id: Only return entries older than this price history ID
         session: Database session (injected by FastAPI)
 
     Returns:
-        ProductReadWithHistory: Product with complete price history
+        ProductReadWithHistory: Product with a page of its price history
 
     Raises:
         HTTPException: 404 if product not found
     """
+    # Serve a recently built response for the same page without the
+    # database. The version is read first: if a scrape changes the product
+    # while this request reads it, the response is stored under the old
+    # version and never served.
+    key = (product_id, _product_versions.get(product_id, 0), limit, offset, before_id)
+    cached = _product_cache.get(key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
     # Query product with price history
-    statement = select(Product).where(Product.id == product_id)
-    product = session.exec(statement).first()
+    product = (await session.exec(PRODUCT_BY_ID, params={"product_id": product_id})).first()
 
     if not product:
         raise HTTPException(
@@ -353,33 +897,26 @@ async def get_product(product_id: int, session: Session = Depends(get_session)):
             detail=f"Product with ID {product_id} not found"
         )
 
-    # Query price history for this product, sorted by timestamp descending
-    price_statement = select(PriceHistory).where(
-        PriceHistory.product_id == product_id
-    ).order_by(PriceHistory.timestamp.desc())
-
-    price_history = session.exec(price_statement).all()
-
-    # Convert to response model
-    price_history_reads = [
-        PriceHistoryRead(
-            id=ph.id,
-            product_id=ph.product_id,
-            store_name=ph.store_name,
-            price=ph.price,
-            timestamp=ph.timestamp
-        )
-        for ph in price_history
-    ]
+    # Query one page of price history for this product, newest first
+    if before_id is None:
+        price_history = (await session.exec(
+            PRICE_HISTORY_BY_PRODUCT,
+            params={"product_id": product_id, "limit": limit, "offset": offset}
+        )).all()
+    else:
+        price_history = (await session.exec(
+            PRICE_HISTORY_BY_PRODUCT_BEFORE,
+            params={"product_id": product_id, "before_id": before_id, "limit": limit, "offset": offset}
+        )).all()
 
-    return ProductReadWithHistory(
-        id=product.id,
-        name=product.name,
-        base_url=product.base_url,
-        created_at=product.created_at,
-        updated_at=product.updated_at,
-        price_history=price_history_reads
-    )
+    # Let the response model read the ORM objects directly
+    content = ProductReadWithHistory.model_validate(
+        product, update={"price_history": price_history}
+    ).model_dump_json().encode()
+
+    _product_cache[key] = content
+
+    return Response(content=content, media_type="application/json")
 
 
 @app.get("/api/test_search")
@@ -407,54 +944,37 @@ async def test_search(title: str, debug: bool = False):
             detail="Product title must be at least 3 characters long"
         )
 
-    print(f"\n{'='*60}")
-    print(f"TEST SEARCH REQUEST")
-    print(f"Title: {title}")
-    print(f"Debug mode: {debug}")
-    print(f"{'='*60}\n")
-
-    # Run searches in parallel using ThreadPoolExecutor
-    loop = asyncio.get_event_loop()
-
-    try:
-        # Search Amazon with debug mode
-        amazon_result = await loop.run_in_executor(
-            executor,
-            lambda: search_amazon(title, debug=debug)
-        )
-
-        # Search MercadoLibre (Mexico by default) with debug mode
-        mercadolibre_result = await loop.run_in_executor(
-            executor,
-            lambda: search_mercadolibre(title, region='mx', debug=debug)
-        )
+    log.debug("Test search request: title=%r, debug=%s", title, debug)
 
-        return {
-            "success": True,
-            "search_term": title,
-            "results": {
-                "amazon": {
-                    "url": amazon_result if amazon_result else None,
-                    "found": bool(amazon_result)
-                },
-                "mercadolibre": {
-                    "url": mercadolibre_result if mercadolibre_result else None,
-                    "found": bool(mercadolibre_result)
-                }
-            },
-            "note": "This is a test endpoint. Results show the first search result from each store."
-        }
+    # Search Amazon and MercadoLibre (Mexico by default) concurrently.
+    # Exceptions are returned instead of raised so one store failing
+    # doesn't hide the other store's result.
+    searches = await asyncio.gather(
+        search_amazon(title, debug=debug),
+        search_mercadolibre(title, region='mx', debug=debug),
+        return_exceptions=True
+    )
 
-    except Exception as e:
-        return {
-            "success": False,
-            "search_term": title,
-            "error": f"Search failed: {str(e)}",
-            "results": {
-                "amazon": {"url": None, "found": False},
-                "mercadolibre": {"url": None, "found": False}
+    results = {}
+    for store, search_result in zip(("amazon", "mercadolibre"), searches):
+        if isinstance(search_result, Exception):
+            results[store] = {
+                "url": None,
+                "found": False,
+                "error": f"Search failed: {str(search_result)}"
             }
-        }
+        else:
+            results[store] = {
+                "url": search_result if search_result else None,
+                "found": bool(search_result)
+            }
+
+    return {
+        "success": not all("error" in result for result in results.values()),
+        "search_term": title,
+        "results": results,
+        "note": "This is a test endpoint. Results show the first search result from each store."
+    }
 
 
 if __name__ == "__main__":
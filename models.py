@@ -6,6 +6,7 @@ Using SQLModel for ORM with FastAPI integration
 from datetime import datetime
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Column, DateTime, Index, func, text
 
 
 class Product(SQLModel, table=True):
@@ -22,8 +23,24 @@ class Product(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True, description="Product name/title")
     base_url: str = Field(unique=True, index=True, description="Amazon product URL")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
-    updated_at: datetime = Field(default_factory=datetime.utcnow, description="Last update timestamp")
+    # Stamped by the database (CURRENT_TIMESTAMP) on insert
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, nullable=False, default=func.now(), server_default=func.now()),
+        description="Creation timestamp"
+    )
+    # Stamped by the database (CURRENT_TIMESTAMP) on insert and on every update
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(
+            DateTime,
+            nullable=False,
+            default=func.now(),
+            server_default=func.now(),
+            onupdate=func.now()
+        ),
+        description="Last update timestamp"
+    )
 
     # Relationship to price history
     price_history: List["PriceHistory"] = Relationship(back_populates="product")
@@ -51,11 +68,23 @@ class PriceHistory(SQLModel, table=True):
         price: Product price at the time of scraping
         timestamp: When the price was recorded
     """
+    # Serves "history for product X, newest first" as an index range scan.
+    # id is the tiebreaker of that ordering, so it is part of the index too
+    # and no sort step is needed.
+    __table_args__ = (
+        Index("ix_price_history_product_ts", "product_id", text("timestamp DESC"), text("id DESC")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     product_id: int = Field(foreign_key="product.id", description="Reference to product")
     store_name: str = Field(default="Amazon.com", description="Store/marketplace name")
     price: float = Field(description="Product price")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Price record timestamp")
+    # Stamped by the database (CURRENT_TIMESTAMP) on insert
+    timestamp: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, nullable=False, default=func.now(), server_default=func.now()),
+        description="Price record timestamp"
+    )
 
     # Relationship to product
     product: Optional[Product] = Relationship(back_populates="price_history")
@@ -3,15 +3,21 @@ Scrapers package for multi-store product scraping.
 """
 
 from .amazon_scraper import scrape_amazon, search_amazon
-from .mercadolibre_scraper import scrape_mercadolibre, search_mercadolibre
-from .scraper_factory import get_scraper_function, get_supported_stores, get_search_function
+from .mercadolibre_scraper import scrape_mercadolibre, scrape_mercadolibre_batch, search_mercadolibre
+from .scraper_factory import get_scraper_function, get_batch_scraper_function, get_supported_stores, get_search_function
+from .browser_pool import close_browser
+from .http_client import close_http_client
 
 __all__ = [
     'scrape_amazon',
     'search_amazon',
     'scrape_mercadolibre',
+    'scrape_mercadolibre_batch',
     'search_mercadolibre',
     'get_scraper_function',
+    'get_batch_scraper_function',
     'get_supported_stores',
-    'get_search_function'
+    'get_search_function',
+    'close_browser',
+    'close_http_client'
 ]
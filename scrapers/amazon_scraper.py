@@ -3,221 +3,353 @@ Amazon Product Scraper
 Extracts product information from Amazon product pages.
 """
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+import logging
+import re
+from typing import Optional
+import httpx
+from cachetools import TTLCache
+from selectolax.parser import HTMLParser
+from playwright.async_api import TimeoutError as PlaywrightTimeout
+from .browser_pool import (
+    HIDE_WEBDRIVER_SCRIPT,
+    NAVIGATION_HEADERS,
+    USER_AGENT,
+    block_unneeded_resources,
+    new_context,
+    stealth_init_script,
+)
+from .http_client import get_http_client
+
+
+log = logging.getLogger(__name__)
+
+
+# Extra headers for plain HTTP fetches of product pages
+HTTP_HEADERS = {
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Anti-detection scripts run before any page script
+PRODUCT_INIT_SCRIPT = stealth_init_script(['en-US', 'en'])
+SEARCH_INIT_SCRIPT = HIDE_WEBDRIVER_SCRIPT
+
+# Present on Amazon's bot-check page instead of the product page
+CAPTCHA_SELECTOR = '#captchacharacters'
+
+# Reads title, price and image URL in the page with one evaluate() call,
+# instead of a query_selector/inner_text round trip per selector. Each
+# field comes from the first selector that matches an element.
+EXTRACT_PRODUCT_JS = """
+([titleSelectors, priceSelectors, imageSelectors]) => {
+    const firstText = (selectors) => {
+        for (const selector of selectors) {
+            const element = document.querySelector(selector);
+            if (element) {
+                return element.innerText.trim();
+            }
+        }
+        return null;
+    };
+
+    let imageUrl = null;
+    for (const selector of imageSelectors) {
+        const image = document.querySelector(selector);
+        if (image) {
+            // Try the src, then the high-res image attributes
+            let url = image.getAttribute('src');
+            if (!url || url.includes('data:image')) {
+                url = image.getAttribute('data-old-hires') ||
+                      image.getAttribute('data-a-dynamic-image');
+            }
+            if (url) {
+                imageUrl = url;
+                break;
+            }
+        }
+    }
 
+    return {
+        title: firstText(titleSelectors),
+        price: firstText(priceSelectors),
+        image_url: imageUrl
+    };
+}
+"""
 
-def scrape_amazon(url: str) -> dict:
+# First URL in a data-a-dynamic-image value ({"https://...jpg":[W,H],...})
+FIRST_IMAGE_URL = re.compile(r'"(https?://[^"]+)"')
+
+# First search result URL per product title, reused for SEARCH_CACHE_TTL
+# seconds since each search costs a full browser page load
+SEARCH_CACHE_TTL = 24 * 60 * 60
+_search_cache = TTLCache(maxsize=1024, ttl=SEARCH_CACHE_TTL)
+
+
+TITLE_SELECTORS = [
+    '#productTitle',
+    'h1#title',
+    'h1.product-title',
+    'span#productTitle'
+]
+
+PRICE_SELECTORS = [
+    'span.a-price.aok-align-center.reinventPricePriceToPayMargin.priceToPay span.a-offscreen',
+    'span.a-price span.a-offscreen',
+    '#priceblock_ourprice',
+    '#priceblock_dealprice',
+    '#price_inside_buybox',
+    '.a-price .a-offscreen',
+    'span[data-a-color="price"] span.a-offscreen'
+]
+
+IMAGE_SELECTORS = [
+    '#landingImage',
+    '#imgBlkFront',
+    '#main-image',
+    'img.a-dynamic-image',
+    '#imageBlock img'
+]
+
+
+def first_dynamic_image_url(img_url: str) -> Optional[str]:
     """
-    Scrapes product information from an Amazon product URL.
+    Gets the image URL to use from an image attribute value.
+
+    data-a-dynamic-image holds a JSON object keyed by image URL; only the
+    first URL is needed, so it is matched directly instead of parsing the
+    whole object.
+
+    Args:
+        img_url: The attribute value
+
+    Returns:
+        The image URL, or None if a JSON value contains no URL
+    """
+    if not img_url.startswith('{'):
+        return img_url
+
+    match = FIRST_IMAGE_URL.search(img_url)
+    return match.group(1) if match else None
+
+
+def extract_image_url(image_element) -> Optional[str]:
+    """
+    Gets the product image URL from an image element's attributes.
+
+    Args:
+        image_element: A selectolax node for the product image
+
+    Returns:
+        The image URL, or None if the element has none
+    """
+    attributes = image_element.attributes
+    img_url = attributes.get('src')
+    if not img_url or 'data:image' in img_url:
+        # Try alternative attributes for high-res images
+        img_url = attributes.get('data-old-hires') or attributes.get('data-a-dynamic-image')
+
+    if not img_url:
+        return None
+
+    return first_dynamic_image_url(img_url)
+
+
+async def scrape_amazon_with_http(url: str) -> Optional[dict]:
+    """
+    Scrapes an Amazon product page with a plain HTTP request.
+
+    Title, price and image are all in the server-rendered HTML, so no
+    browser is needed unless Amazon answers with a bot check.
 
     Args:
         url: The Amazon product URL
 
     Returns:
-        Dictionary containing title, price, and image_url
+        Dictionary containing title, price, and image_url, or None if the
+        title or price could not be read this way
     """
+    try:
+        response = await get_http_client().get(url, headers=HTTP_HEADERS)
+    except httpx.HTTPError as e:
+        log.warning("Amazon HTTP request failed: %s", e)
+        return None
+
+    if response.status_code != 200:
+        log.warning("Amazon HTTP request returned status %d", response.status_code)
+        return None
+
+    tree = HTMLParser(response.text)
+    if tree.css_first(CAPTCHA_SELECTOR) is not None:
+        log.warning("Amazon returned a bot check page")
+        return None
+
     result = {
         'title': None,
         'price': None,
         'image_url': None
     }
 
-    with sync_playwright() as p:
-        # Launch browser with anti-detection settings
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process'
-            ]
-        )
-
-        # Create context with realistic settings
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            locale='en-US',
-            timezone_id='America/New_York',
-            permissions=['geolocation'],
-            geolocation={'latitude': 40.7128, 'longitude': -74.0060},
-            extra_http_headers={
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Cache-Control': 'max-age=0'
-            }
-        )
+    for selector in TITLE_SELECTORS:
+        title_element = tree.css_first(selector)
+        if title_element:
+            result['title'] = title_element.text(strip=True)
+            break
+
+    for selector in PRICE_SELECTORS:
+        price_element = tree.css_first(selector)
+        if price_element:
+            result['price'] = price_element.text(strip=True)
+            break
+
+    for selector in IMAGE_SELECTORS:
+        image_element = tree.css_first(selector)
+        if image_element:
+            img_url = extract_image_url(image_element)
+            if img_url:
+                result['image_url'] = img_url
+                break
+
+    # A partial page (e.g. no buy box in the raw HTML) goes to the browser
+    if not result['title'] or not result['price']:
+        return None
+
+    return result
 
-        page = context.new_page()
 
-        # Hide webdriver detection
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
+async def scrape_amazon(url: str) -> dict:
+    """
+    Scrapes product information from an Amazon product URL.
 
-            // Overwrite the `plugins` property to use a custom getter.
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5]
-            });
+    Tries a plain HTTP fetch first and falls back to the browser when
+    Amazon serves a bot check or the product details are missing.
 
-            // Overwrite the `languages` property to use a custom getter.
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en']
-            });
+    Args:
+        url: The Amazon product URL
 
-            // Chrome specific
-            window.chrome = {
-                runtime: {}
-            };
-        """)
+    Returns:
+        Dictionary containing title, price, and image_url
+    """
+    log.info("Fetching Amazon page: %s", url)
+    result = await scrape_amazon_with_http(url)
+    if result is not None:
+        log.info("Amazon page fetched without browser")
+        return result
 
-        try:
-            # Navigate to the product page
-            print(f"Loading Amazon page: {url}")
-            page.goto(url, wait_until='networkidle', timeout=45000)
+    log.info("Falling back to browser for Amazon page")
+    return await scrape_amazon_with_browser(url)
 
-            # Wait a bit for dynamic content to load
-            page.wait_for_timeout(3000)
 
-            print("Amazon page loaded successfully")
+async def scrape_amazon_with_browser(url: str) -> dict:
+    """
+    Scrapes product information from an Amazon product URL with Playwright.
 
-            # Extract product title
-            try:
-                title_selectors = [
-                    '#productTitle',
-                    'h1#title',
-                    'h1.product-title',
-                    'span#productTitle'
-                ]
-
-                for selector in title_selectors:
-                    title_element = page.query_selector(selector)
-                    if title_element:
-                        result['title'] = title_element.inner_text().strip()
-                        break
+    Uses a context on the shared browser from browser_pool instead of
+    launching a new browser for every call.
 
-            except Exception as e:
-                print(f"Error extracting title: {e}")
+    Args:
+        url: The Amazon product URL
 
-            # Extract price
+    Returns:
+        Dictionary containing title, price, and image_url
+    """
+    result = {
+        'title': None,
+        'price': None,
+        'image_url': None
+    }
+
+    # Create context with realistic settings
+    async with new_context(
+        init_script=PRODUCT_INIT_SCRIPT,
+        viewport={'width': 1920, 'height': 1080},
+        user_agent=USER_AGENT,
+        locale='en-US',
+        timezone_id='America/New_York',
+        permissions=['geolocation'],
+        geolocation={'latitude': 40.7128, 'longitude': -74.0060},
+        extra_http_headers={
+            **NAVIGATION_HEADERS,
+            'Accept-Language': 'en-US,en;q=0.9'
+        }
+    ) as context:
+
+        await context.route("**/*", block_unneeded_resources)
+
+        page = await context.new_page()
+
+        try:
+            # Navigate to the product page
+            log.info("Loading Amazon page: %s", url)
+            await page.goto(url, wait_until='domcontentloaded', timeout=15000)
+
+            # Wait only until the title or price is in the DOM; the page never
+            # goes network-idle because of ads and beacons
             try:
-                price_selectors = [
-                    'span.a-price.aok-align-center.reinventPricePriceToPayMargin.priceToPay span.a-offscreen',
-                    'span.a-price span.a-offscreen',
-                    '#priceblock_ourprice',
-                    '#priceblock_dealprice',
-                    '#price_inside_buybox',
-                    '.a-price .a-offscreen',
-                    'span[data-a-color="price"] span.a-offscreen'
-                ]
-
-                for selector in price_selectors:
-                    price_element = page.query_selector(selector)
-                    if price_element:
-                        result['price'] = price_element.inner_text().strip()
-                        break
+                await page.wait_for_selector(
+                    ', '.join(TITLE_SELECTORS + PRICE_SELECTORS),
+                    state='attached',
+                    timeout=6000
+                )
+            except PlaywrightTimeout:
+                log.warning("Amazon product details did not appear, extracting what is available")
 
-            except Exception as e:
-                print(f"Error extracting price: {e}")
+            log.info("Amazon page loaded successfully")
 
-            # Extract main image URL
+            # Extract title, price and image in a single round trip
             try:
-                image_selectors = [
-                    '#landingImage',
-                    '#imgBlkFront',
-                    '#main-image',
-                    'img.a-dynamic-image',
-                    '#imageBlock img'
-                ]
-
-                for selector in image_selectors:
-                    image_element = page.query_selector(selector)
-                    if image_element:
-                        # Try to get the src or data-old-hires attribute
-                        img_url = image_element.get_attribute('src')
-                        if not img_url or 'data:image' in img_url:
-                            # Try alternative attributes for high-res images
-                            img_url = (image_element.get_attribute('data-old-hires') or
-                                     image_element.get_attribute('data-a-dynamic-image'))
-
-                        if img_url:
-                            # If data-a-dynamic-image, it's a JSON object, extract first URL
-                            if img_url.startswith('{'):
-                                import json
-                                try:
-                                    img_data = json.loads(img_url)
-                                    img_url = list(img_data.keys())[0]
-                                except:
-                                    pass
-
-                            result['image_url'] = img_url
-                            break
+                data = await page.evaluate(
+                    EXTRACT_PRODUCT_JS,
+                    [TITLE_SELECTORS, PRICE_SELECTORS, IMAGE_SELECTORS]
+                )
+                result['title'] = data['title']
+                result['price'] = data['price']
+                if data['image_url']:
+                    result['image_url'] = first_dynamic_image_url(data['image_url'])
 
             except Exception as e:
-                print(f"Error extracting image: {e}")
+                log.error("Error extracting Amazon product data: %s", e)
 
         except PlaywrightTimeout:
-            print("Error: Amazon page load timeout. Please check the URL and try again.")
+            log.error("Amazon page load timeout. Please check the URL and try again.")
         except Exception as e:
-            print(f"Error loading Amazon page: {e}")
-        finally:
-            context.close()
-            browser.close()
+            log.error("Error loading Amazon page: %s", e)
 
     return result
 
 
-def search_amazon(product_title: str, debug: bool = False) -> str:
+async def search_amazon(product_title: str, debug: bool = False) -> str:
     """
     Searches for a product on Amazon and returns the URL of the first result.
 
+    Found URLs are cached for SEARCH_CACHE_TTL seconds per title.
+
     Args:
         product_title: The product title to search for
-        debug: If True, saves screenshots and prints extra debug info
+        debug: If True, saves screenshots and the page HTML for debugging
 
     Returns:
         URL of the first search result, or empty string if not found
     """
-    result_url = ""
+    # Debug runs always search, for the screenshots and saved HTML
+    if not debug:
+        cached_url = _search_cache.get(product_title)
+        if cached_url:
+            log.debug("Using cached Amazon search result: %s", cached_url)
+            return cached_url
 
-    with sync_playwright() as p:
-        # Launch browser with anti-detection settings
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-            ]
-        )
+    result_url = ""
 
-        # Create context with realistic settings
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            locale='en-US',
-        )
+    # Create context with realistic settings
+    async with new_context(
+        init_script=SEARCH_INIT_SCRIPT,
+        viewport={'width': 1920, 'height': 1080},
+        user_agent=USER_AGENT,
+        locale='en-US',
+    ) as context:
 
-        page = context.new_page()
+        await context.route("**/*", block_unneeded_resources)
 
-        # Hide webdriver detection
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
+        page = await context.new_page()
 
         try:
             # Build search URL
@@ -225,21 +357,21 @@ def search_amazon(product_title: str, debug: bool = False) -> str:
             search_query = urllib.parse.quote(product_title)
             search_url = f"https://www.amazon.com/s?k={search_query}"
 
-            print(f"[DEBUG] Searching Amazon for: '{product_title}'")
-            print(f"[DEBUG] Search URL: {search_url}")
+            log.debug("Searching Amazon for: '%s'", product_title)
+            log.debug("Search URL: %s", search_url)
 
-            page.goto(search_url, wait_until='domcontentloaded', timeout=20000)
-            print(f"[DEBUG] Page loaded, waiting for content...")
-            page.wait_for_timeout(3000)
+            await page.goto(search_url, wait_until='domcontentloaded', timeout=20000)
+            log.debug("Page loaded, waiting for content...")
+            await page.wait_for_timeout(3000)
 
             # Take screenshot for debugging
             if debug:
-                page.screenshot(path='debug_amazon_search.png')
-                print(f"[DEBUG] Screenshot saved: debug_amazon_search.png")
+                await page.screenshot(path='debug_amazon_search.png')
+                log.debug("Screenshot saved: debug_amazon_search.png")
 
             # Check page title to see if we got blocked
-            page_title = page.title()
-            print(f"[DEBUG] Page title: {page_title}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Page title: %s", await page.title())
 
             # Find first product result
             # Try multiple selectors for product links
@@ -252,46 +384,46 @@ def search_amazon(product_title: str, debug: bool = False) -> str:
                 'div.s-result-list div[data-asin] h2 a'
             ]
 
-            print(f"[DEBUG] Trying {len(product_link_selectors)} different selectors...")
+            log.debug("Trying %d different selectors...", len(product_link_selectors))
             for i, selector in enumerate(product_link_selectors):
-                print(f"[DEBUG] Trying selector {i+1}: {selector}")
-                link_element = page.query_selector(selector)
+                log.debug("Trying selector %d: %s", i + 1, selector)
+                link_element = await page.query_selector(selector)
                 if link_element:
-                    href = link_element.get_attribute('href')
+                    href = await link_element.get_attribute('href')
                     if href:
                         # Build full URL
                         if href.startswith('/'):
                             result_url = f"https://www.amazon.com{href}"
                         else:
                             result_url = href
-                        print(f"[SUCCESS] Found Amazon product with selector {i+1}: {result_url}")
+                        log.info("Found Amazon product with selector %d: %s", i + 1, result_url)
                         break
                 else:
-                    print(f"[DEBUG] Selector {i+1} found no elements")
+                    log.debug("Selector %d found no elements", i + 1)
 
             if not result_url:
-                print(f"[WARNING] No product found with any selector")
+                log.warning("No Amazon product found for: '%s'", product_title)
                 if debug:
                     # Save HTML for debugging
-                    html_content = page.content()
+                    html_content = await page.content()
                     with open('debug_amazon_search.html', 'w', encoding='utf-8') as f:
                         f.write(html_content)
-                    print(f"[DEBUG] HTML saved: debug_amazon_search.html")
+                    log.debug("HTML saved: debug_amazon_search.html")
 
         except PlaywrightTimeout as e:
-            print(f"[ERROR] Amazon search timeout: {e}")
+            log.error("Amazon search timeout: %s", e)
             if debug and page:
                 try:
-                    page.screenshot(path='debug_amazon_timeout.png')
-                    print(f"[DEBUG] Timeout screenshot saved")
+                    await page.screenshot(path='debug_amazon_timeout.png')
+                    log.debug("Timeout screenshot saved")
                 except:
                     pass
         except Exception as e:
-            print(f"[ERROR] Error searching Amazon: {e}")
-            import traceback
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
-        finally:
-            context.close()
-            browser.close()
+            # The traceback is only formatted when debug logging is on
+            log.error("Error searching Amazon: %s", e, exc_info=log.isEnabledFor(logging.DEBUG))
+
+    # Only found products are cached; an empty result may be a bot check
+    if result_url:
+        _search_cache[product_title] = result_url
 
     return result_url
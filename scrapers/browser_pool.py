@@ -0,0 +1,201 @@
+"""
+Shared Browser Pool
+Keeps one Chromium instance alive for all scrapers and hands out isolated
+browser contexts, instead of launching a new browser for every request.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Sequence
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright, Route
+
+
+# Maximum number of browser contexts (pages being scraped) open at once.
+# Further requests wait for a free slot instead of opening more pages.
+MAX_CONTEXTS = 3
+
+# Chromium launch arguments with anti-detection settings, followed by
+# settings that cut memory and background CPU use. Nothing is ever shown or
+# played, and images are neither needed nor downloaded.
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--no-zygote',
+    '--disable-gpu',
+    '--disable-accelerated-2d-canvas',
+    '--disable-mipmap-generation',
+    '--disable-partial-raster',
+    '--disable-renderer-backgrounding',
+    '--disable-background-networking',
+    '--disable-extensions',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--mute-audio',
+    '--hide-scrollbars',
+    '--blink-settings=imagesEnabled=false'
+]
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'
+
+# Headers a browser sends when the user opens a page directly. Scrapers
+# add their own Accept-Language.
+NAVIGATION_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}
+
+# Init script hiding the navigator.webdriver flag automation sets
+HIDE_WEBDRIVER_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+"""
+
+# Resource types that are never needed to read product data. Image URLs are
+# read from the <img> attributes, so the image bytes themselves are not.
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'stylesheet', 'media'}
+
+# Analytics and ad hosts, blocked whatever the resource type
+BLOCKED_URL_PARTS = (
+    'google-analytics',
+    'googletagmanager',
+    'doubleclick',
+    'googlesyndication',
+    'facebook.net',
+    'hotjar',
+)
+
+_playwright: Optional[Playwright] = None
+_browser: Optional[Browser] = None
+
+# Created on first use so they belong to the running event loop
+_launch_lock: Optional[asyncio.Lock] = None
+_context_slots: Optional[asyncio.Semaphore] = None
+
+
+async def get_browser() -> Browser:
+    """
+    Returns the shared browser, launching it on first use.
+
+    The browser is relaunched if it was closed or has crashed.
+
+    Returns:
+        The shared Playwright Browser instance
+    """
+    global _playwright, _browser, _launch_lock
+
+    if _launch_lock is None:
+        _launch_lock = asyncio.Lock()
+
+    async with _launch_lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+
+            _browser = await _playwright.chromium.launch(
+                headless=True,
+                args=LAUNCH_ARGS
+            )
+
+    return _browser
+
+
+def stealth_init_script(languages: Sequence[str]) -> str:
+    """
+    Builds an init script that makes an automated page look like a
+    regular Chrome window.
+
+    Hides navigator.webdriver and fakes the plugins, languages and
+    window.chrome objects headless Chromium leaves empty.
+
+    Args:
+        languages: Value for navigator.languages, e.g. ['en-US', 'en']
+
+    Returns:
+        The script, for new_context(init_script=...)
+    """
+    return HIDE_WEBDRIVER_SCRIPT + """
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+
+    Object.defineProperty(navigator, 'languages', {
+        get: () => %s
+    });
+
+    window.chrome = {
+        runtime: {}
+    };
+""" % json.dumps(list(languages))
+
+
+async def block_unneeded_resources(route: Route) -> None:
+    """Aborts requests for images, fonts, stylesheets, media and trackers."""
+    request = route.request
+    if (request.resource_type in BLOCKED_RESOURCE_TYPES
+            or any(part in request.url for part in BLOCKED_URL_PARTS)):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@asynccontextmanager
+async def new_context(init_script: Optional[str] = None, **context_options) -> AsyncIterator[BrowserContext]:
+    """
+    Opens a browser context on the shared browser and closes it afterwards.
+
+    At most MAX_CONTEXTS contexts are open at the same time; callers wait
+    for a free slot.
+
+    Args:
+        init_script: Script to run before any page script in every page of
+            the context. Added once here rather than to each page, so it is
+            sent to the browser once however many pages are opened.
+        **context_options: Options passed to Browser.new_context()
+
+    Yields:
+        A fresh, isolated BrowserContext
+    """
+    global _context_slots
+
+    if _context_slots is None:
+        _context_slots = asyncio.Semaphore(MAX_CONTEXTS)
+
+    async with _context_slots:
+        browser = await get_browser()
+        context = await browser.new_context(**context_options)
+        try:
+            if init_script:
+                await context.add_init_script(init_script)
+            yield context
+        finally:
+            await context.close()
+
+
+async def close_browser() -> None:
+    """
+    Closes the shared browser and stops Playwright.
+
+    Should be called on application shutdown.
+    """
+    global _playwright, _browser
+
+    if _browser is not None:
+        await _browser.close()
+        _browser = None
+
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
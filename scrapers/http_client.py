@@ -0,0 +1,64 @@
+"""
+Shared HTTP Client
+Keeps one HTTP/2 connection pool open for the scrapers' plain HTTP fetches,
+instead of opening new connections (and TLS handshakes) for every page.
+"""
+
+from typing import Optional
+import httpx
+from .browser_pool import USER_AGENT
+
+
+# Headers for plain HTTP fetches. Scrapers add their own Accept-Language
+# per request. Accept-Encoding is left to httpx so it only advertises
+# encodings it can decode.
+HTTP_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'DNT': '1',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}
+
+# Connection pool size. HTTP/2 multiplexes requests to one store over a
+# single connection, so these mostly bound HTTP/1.1 fallbacks.
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared HTTP client, creating it on first use.
+
+    Reusing one client keeps connections to the stores open between
+    scrapes.
+    """
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=10,
+            headers=HTTP_HEADERS,
+            limits=HTTP_LIMITS,
+            follow_redirects=True
+        )
+
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """
+    Closes the shared HTTP client.
+
+    Should be called on application shutdown.
+    """
+    global _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
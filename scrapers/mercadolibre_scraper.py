@@ -3,202 +3,681 @@ MercadoLibre Product Scraper
 Extracts product information from MercadoLibre product pages.
 """
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import List, Optional
+import httpx
+from cachetools import TTLCache
+from selectolax.parser import HTMLParser
+from playwright.async_api import BrowserContext, TimeoutError as PlaywrightTimeout
+from .browser_pool import (
+    HIDE_WEBDRIVER_SCRIPT,
+    NAVIGATION_HEADERS,
+    USER_AGENT,
+    block_unneeded_resources,
+    new_context,
+    stealth_init_script,
+)
+from .http_client import get_http_client
+
+
+log = logging.getLogger(__name__)
+
+
+# Elements whose presence means the data to extract has rendered
+PRODUCT_READY_SELECTOR = 'h1.ui-pdp-title, .andes-money-amount__fraction'
+SEARCH_READY_SELECTOR = '.ui-search-layout__item, .ui-search-result'
+
+# Alternatives for each field, joined into a single CSS selector list so
+# each field takes one query. A selector list matches the first element in
+# document order, and all alternatives target the same canonical element.
+TITLE_SELECTOR = ', '.join([
+    'h1.ui-pdp-title',
+    '.ui-pdp-title',
+    'h1[class*="title"]',
+    'h1.item-title',
+    '.item-title__primary'
+])
+
+PRICE_SELECTOR = ', '.join([
+    '.andes-money-amount__fraction',
+    '.price-tag-fraction',
+    'span[class*="price-tag-fraction"]',
+    '.price-tag-amount'
+])
+
+PRICE_META_SELECTOR = 'meta[itemprop="price"]'
+
+CURRENCY_SELECTOR = '.andes-money-amount__currency-symbol'
+
+IMAGE_SELECTOR = ', '.join([
+    'figure.ui-pdp-gallery__figure img',
+    '.ui-pdp-image',
+    'img.ui-pdp-gallery__figure__image',
+    'figure img[data-zoom]',
+    '.gallery-image img',
+    'img[class*="gallery"]'
+])
+
+PRODUCT_LINK_SELECTOR = ', '.join([
+    '.ui-search-layout__item a.ui-search-link',
+    '.ui-search-result__content a',
+    'a.ui-search-item__group__element',
+    '.ui-search-result a[href*="/ML"]',
+    'li.ui-search-layout__item a[href*="/ML"]',
+    '.ui-search-result__content-wrapper a'
+])
+
+# Everything from the first "?" or "#" of a URL on
+QUERY_AND_FRAGMENT = re.compile(r'[?#].*')
+
+# Open Graph image, present in the server-rendered HTML of product pages
+OG_IMAGE_SELECTOR = 'meta[property="og:image"]'
+
+# Product data the page embeds for its own scripts, either as a JSON script
+# element or assigned to window.__PRELOADED_STATE__ in an inline script
+PRELOADED_STATE_SELECTOR = 'script#__PRELOADED_STATE__'
+PRELOADED_STATE_SCRIPT = re.compile(r'window\.__PRELOADED_STATE__\s*=\s*(\{.*?\});?\s*</script>', re.S)
+
+# Extra headers for plain HTTP fetches of product pages
+HTTP_HEADERS = {
+    'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+}
+
+# Reads title, price, currency and image URL in the page with one
+# evaluate() call, instead of a driver round trip per element and attribute
+EXTRACT_PRODUCT_JS = """
+([titleSelector, priceSelector, priceMetaSelector, currencySelector, imageSelector]) => {
+    const text = (selector) => {
+        const element = document.querySelector(selector);
+        return element ? element.innerText.trim() : null;
+    };
+
+    const priceMeta = document.querySelector(priceMetaSelector);
+
+    let imageUrl = null;
+    const image = document.querySelector(imageSelector);
+    if (image) {
+        // Try different attributes
+        const url = image.getAttribute('src') ||
+                    image.getAttribute('data-src') ||
+                    image.getAttribute('data-zoom');
+        if (url && !url.startsWith('data:')) {
+            imageUrl = url;
+        }
+    }
+
+    return {
+        title: text(titleSelector),
+        price: text(priceSelector),
+        price_meta: priceMeta ? priceMeta.getAttribute('content') : null,
+        currency: text(currencySelector),
+        image_url: imageUrl
+    };
+}
+"""
+
+# Anti-detection scripts run before any page script
+PRODUCT_INIT_SCRIPT = stealth_init_script(['es-ES', 'es', 'en'])
+SEARCH_INIT_SCRIPT = HIDE_WEBDRIVER_SCRIPT
+
+# Matches a price text that already carries its currency
+CURRENCY_IN_PRICE = re.compile(r'[$€£]|USD|MXN|ARS')
+
+# Wall-clock limit for loading and reading one product page in the browser
+PAGE_BUDGET_SECONDS = 20
+
+# Cookies and local storage of the last successful context per region
+# (mx, ar, ...), loaded into later contexts. The directory holds session
+# cookies and is kept out of git.
+STORAGE_STATE_DIR = os.getenv("SCRAPER_STATE_DIR", ".scraper_state")
+STORAGE_STATE_FILE = os.path.join(STORAGE_STATE_DIR, 'mercadolibre_{region}.json')
+
+# Saved sessions older than this are not loaded, so expired or
+# bot-flagged cookies stop being reused even if no later scrape succeeds
+STORAGE_STATE_MAX_AGE = 24 * 60 * 60
+
+# Country code at the end of a MercadoLibre host, e.g. mercadolibre.com.mx
+SITE_REGION = re.compile(r'mercadoli[bv]re\.com\.([a-z]{2})\b', re.IGNORECASE)
+
+# Pages opened in one browser context during a batch before it is replaced
+PAGES_PER_CONTEXT = 50
+
+# First search result URL per (region, product title), reused for
+# SEARCH_CACHE_TTL seconds since each search costs a full browser page load
+SEARCH_CACHE_TTL = 24 * 60 * 60
+_search_cache = TTLCache(maxsize=1024, ttl=SEARCH_CACHE_TTL)
+
+# Context settings for product pages, realistic for Latin America
+SCRAPE_CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': USER_AGENT,
+    'locale': 'es-ES',
+    'timezone_id': 'America/Mexico_City',
+    'permissions': ['geolocation'],
+    'geolocation': {'latitude': 19.4326, 'longitude': -99.1332},  # Mexico City
+    'extra_http_headers': {
+        **NAVIGATION_HEADERS,
+        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
+    }
+}
 
+# Context settings for search pages
+SEARCH_CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': USER_AGENT,
+    'locale': 'es-ES'
+}
 
-def scrape_mercadolibre(url: str) -> dict:
+
+async def scrape_mercadolibre(url: str, context: Optional[BrowserContext] = None) -> dict:
     """
     Scrapes product information from a MercadoLibre product URL.
 
+    Tries a plain HTTP fetch first and falls back to a context on the
+    shared browser from browser_pool when the title or price is missing,
+    e.g. on pages rendered client-side.
+
     Args:
         url: The MercadoLibre product URL
+        context: Browser context to open the page in if the browser is
+            needed, e.g. one shared by several scrapes. It is used as is,
+            so it should be opened with SCRAPE_CONTEXT_OPTIONS and
+            PRODUCT_INIT_SCRIPT. A new context is opened (and closed) if
+            omitted.
 
     Returns:
         Dictionary containing title, price, and image_url
     """
+    log.info("Fetching MercadoLibre page: %s", url)
+    result = await scrape_mercadolibre_with_http(url)
+    if result is not None:
+        log.info("MercadoLibre page fetched without browser")
+        return result
+
+    log.info("Falling back to browser for MercadoLibre page")
+    if context is not None:
+        return await scrape_product_page_within_budget(context, url)
+
+    region = region_from_url(url)
+    async with new_context(
+        init_script=PRODUCT_INIT_SCRIPT,
+        **with_storage_state(SCRAPE_CONTEXT_OPTIONS, region)
+    ) as context:
+        result = await scrape_product_page_within_budget(context, url)
+        if result['title']:
+            await save_storage_state(context, region)
+        return result
+
+
+async def scrape_mercadolibre_batch(urls: List[str], max_concurrency: int = 5) -> List[dict]:
+    """
+    Scrapes several MercadoLibre product URLs concurrently.
+
+    Every URL is tried over plain HTTP first. The ones that need the
+    browser are then opened as tabs of one browser context, with at most
+    max_concurrency pages loading at the same time. Only pages are closed
+    between URLs; the context is reused for up to PAGES_PER_CONTEXT pages.
+
+    Args:
+        urls: The MercadoLibre product URLs
+        max_concurrency: Maximum number of pages open at once
+
+    Returns:
+        One dictionary with title, price, and image_url per URL, in order
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(url: str) -> Optional[dict]:
+        async with semaphore:
+            return await scrape_mercadolibre_with_http(url)
+
+    results = await asyncio.gather(*(fetch(url) for url in urls))
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    # Each region's URLs get their own contexts, starting from and saving
+    # to that region's session
+    pending_by_region = {}
+    for i in pending:
+        pending_by_region.setdefault(region_from_url(urls[i]), []).append(i)
+
+    for region, region_pending in pending_by_region.items():
+        # A context is replaced after PAGES_PER_CONTEXT pages so memory it
+        # holds on to does not build up over long batches
+        for start in range(0, len(region_pending), PAGES_PER_CONTEXT):
+            group = region_pending[start:start + PAGES_PER_CONTEXT]
+
+            async with new_context(
+                init_script=PRODUCT_INIT_SCRIPT,
+                **with_storage_state(SCRAPE_CONTEXT_OPTIONS, region)
+            ) as context:
+                async def scrape(url: str) -> dict:
+                    async with semaphore:
+                        return await scrape_product_page_within_budget(context, url)
+
+                scraped = await asyncio.gather(*(scrape(urls[i]) for i in group))
+                if any(result['title'] for result in scraped):
+                    await save_storage_state(context, region)
+
+            for i, result in zip(group, scraped):
+                results[i] = result
+
+    return results
+
+
+def region_from_url(url: str) -> str:
+    """
+    Gets the MercadoLibre region (mx, ar, co, ...) from a product URL.
+
+    Args:
+        url: The MercadoLibre product URL
+
+    Returns:
+        The country code of the site, 'mx' if it cannot be told
+    """
+    match = SITE_REGION.search(url)
+    return match.group(1).lower() if match else 'mx'
+
+
+def with_storage_state(context_options: dict, region: str) -> dict:
+    """
+    Adds the region's saved cookies and local storage to context options.
+
+    Args:
+        context_options: Options for Browser.new_context()
+        region: MercadoLibre region the context will visit
+
+    Returns:
+        The options, with storage_state set if a session was saved less
+        than STORAGE_STATE_MAX_AGE seconds ago
+    """
+    path = STORAGE_STATE_FILE.format(region=region)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return context_options
+
+    if age > STORAGE_STATE_MAX_AGE:
+        return context_options
+
+    return {**context_options, 'storage_state': path}
+
+
+async def save_storage_state(context: BrowserContext, region: str) -> None:
+    """
+    Saves a context's cookies and local storage for the region.
+
+    Later contexts start from this state, so MercadoLibre treats them as
+    returning visitors (no consent banner, cached first-visit setup).
+    Each successful context replaces the saved state, keeping its cookies
+    fresh.
+
+    Args:
+        context: A context that loaded MercadoLibre pages successfully
+        region: MercadoLibre region the context visited
+    """
+    path = STORAGE_STATE_FILE.format(region=region)
+
+    try:
+        state = await context.storage_state()
+        os.makedirs(STORAGE_STATE_DIR, exist_ok=True)
+
+        # Written to a temporary file first so a context opening at the
+        # same time never loads a half-written file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, path)
+    except Exception as e:
+        log.warning("Error saving MercadoLibre session: %s", e)
+
+
+async def scrape_mercadolibre_with_http(url: str) -> Optional[dict]:
+    """
+    Scrapes a MercadoLibre product page with a plain HTTP request.
+
+    Most product pages are rendered on the server, so title, price and
+    the Open Graph image are in the initial HTML.
+
+    Args:
+        url: The MercadoLibre product URL
+
+    Returns:
+        Dictionary containing title, price, and image_url, or None if the
+        title or price could not be read this way
+    """
+    try:
+        response = await get_http_client().get(url, headers=HTTP_HEADERS)
+    except httpx.HTTPError as e:
+        log.warning("MercadoLibre HTTP request failed: %s", e)
+        return None
+
+    if response.status_code != 200:
+        log.warning("MercadoLibre HTTP request returned status %d", response.status_code)
+        return None
+
+    html = response.text
+    tree = HTMLParser(html)
+
+    # Prefer the product JSON the page embeds for its own scripts, which
+    # does not depend on CSS class names, and fill any gaps from the HTML
+    result = {}
+    state = read_preloaded_state(html, tree)
+    if state:
+        try:
+            result = product_from_preloaded_state(state)
+        except (AttributeError, TypeError) as e:
+            # The state's layout is not what was expected
+            log.warning("Error reading MercadoLibre preloaded state: %s", e)
+    if not all(result.get(field) for field in ('title', 'price', 'image_url')):
+        for field, value in product_from_html(tree).items():
+            if not result.get(field):
+                result[field] = value
+
+    if not result['title'] or not result['price']:
+        return None
+
+    return result
+
+
+def read_preloaded_state(html: str, tree: HTMLParser) -> Optional[dict]:
+    """
+    Reads the __PRELOADED_STATE__ JSON embedded in a product page.
+
+    Args:
+        html: The page HTML
+        tree: The parsed page
+
+    Returns:
+        The decoded state, or None if the page has none or it is invalid
+    """
+    state_element = tree.css_first(PRELOADED_STATE_SELECTOR)
+    if state_element:
+        raw_state = state_element.text()
+    else:
+        match = PRELOADED_STATE_SCRIPT.search(html)
+        raw_state = match.group(1) if match else None
+
+    if not raw_state:
+        return None
+
+    try:
+        state = json.loads(raw_state)
+    except ValueError:
+        return None
+
+    return state if isinstance(state, dict) else None
+
+
+def product_from_preloaded_state(state: dict) -> dict:
+    """
+    Gets title, price and image URL from a page's preloaded state.
+
+    Args:
+        state: The decoded __PRELOADED_STATE__ object
+
+    Returns:
+        Dictionary containing title, price, and image_url; fields not in
+        the state are None
+    """
     result = {
         'title': None,
         'price': None,
         'image_url': None
     }
 
-    with sync_playwright() as p:
-        # Launch browser with anti-detection settings
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-                '--disable-web-security',
-                '--disable-features=IsolateOrigins,site-per-process'
-            ]
-        )
+    initial_state = state.get('pageState', state).get('initialState') or {}
+    components = initial_state.get('components') or {}
+
+    header = components.get('header') or {}
+    result['title'] = header.get('title')
+
+    price = (components.get('price') or {}).get('price') or {}
+    value = price.get('value')
+    if isinstance(value, (int, float)):
+        # Whole prices come as 1299.0; drop the decimals like the page does
+        if float(value).is_integer():
+            value = int(value)
+        result['price'] = format_price(None, str(value), price.get('currency_symbol'))
+
+    gallery = components.get('gallery') or {}
+    pictures = gallery.get('pictures') or []
+    if pictures:
+        picture = pictures[0]
+        template = (gallery.get('picture_config') or {}).get('template')
+        if picture.get('url'):
+            result['image_url'] = picture['url']
+        elif template and picture.get('id'):
+            result['image_url'] = template.replace('{id}', picture['id'])
 
-        # Create context with realistic settings for Latin America
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            locale='es-ES',
-            timezone_id='America/Mexico_City',
-            permissions=['geolocation'],
-            geolocation={'latitude': 19.4326, 'longitude': -99.1332},  # Mexico City
-            extra_http_headers={
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Cache-Control': 'max-age=0'
-            }
-        )
+    return result
 
-        page = context.new_page()
 
-        # Hide webdriver detection
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
+def product_from_html(tree: HTMLParser) -> dict:
+    """
+    Gets title, price and image URL from a product page's HTML elements.
 
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5]
-            });
+    Args:
+        tree: The parsed page
 
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['es-ES', 'es', 'en']
-            });
+    Returns:
+        Dictionary containing title, price, and image_url
+    """
+    title_element = tree.css_first(TITLE_SELECTOR)
+    price_element = tree.css_first(PRICE_SELECTOR)
+    price_meta_element = tree.css_first(PRICE_META_SELECTOR)
+    currency_element = tree.css_first(CURRENCY_SELECTOR)
 
-            window.chrome = {
-                runtime: {}
-            };
-        """)
+    result = {
+        'title': title_element.text(strip=True) if title_element else None,
+        'price': format_price(
+            price_element.text(strip=True) if price_element else None,
+            price_meta_element.attributes.get('content') if price_meta_element else None,
+            currency_element.text(strip=True) if currency_element else None
+        ),
+        'image_url': None
+    }
 
-        try:
-            # Navigate to the product page
-            print(f"Loading MercadoLibre page: {url}")
-            page.goto(url, wait_until='networkidle', timeout=45000)
+    image_element = tree.css_first(OG_IMAGE_SELECTOR)
+    if image_element:
+        result['image_url'] = image_element.attributes.get('content')
+    else:
+        image_element = tree.css_first(IMAGE_SELECTOR)
+        if image_element:
+            attributes = image_element.attributes
+            img_url = attributes.get('src') or attributes.get('data-src') or attributes.get('data-zoom')
+            if img_url and not img_url.startswith('data:'):
+                result['image_url'] = img_url
 
-            # Wait a bit for dynamic content to load
-            page.wait_for_timeout(3000)
+    return result
 
-            print("MercadoLibre page loaded successfully")
 
-            # Extract product title
-            try:
-                title_selectors = [
-                    'h1.ui-pdp-title',
-                    '.ui-pdp-title',
-                    'h1[class*="title"]',
-                    'h1.item-title',
-                    '.item-title__primary'
-                ]
-
-                for selector in title_selectors:
-                    title_element = page.query_selector(selector)
-                    if title_element:
-                        result['title'] = title_element.inner_text().strip()
-                        break
-
-            except Exception as e:
-                print(f"Error extracting title: {e}")
-
-            # Extract price
-            try:
-                price_selectors = [
-                    '.andes-money-amount__fraction',
-                    '.price-tag-fraction',
-                    'span.andes-money-amount__fraction',
-                    '.andes-money-amount--cents-superscript .andes-money-amount__fraction',
-                    'span[class*="price-tag-fraction"]',
-                    '.price-tag-amount',
-                    'meta[itemprop="price"]'
-                ]
-
-                for selector in price_selectors:
-                    if selector.startswith('meta'):
-                        # For meta tags, get the content attribute
-                        price_element = page.query_selector(selector)
-                        if price_element:
-                            price_value = price_element.get_attribute('content')
-                            if price_value:
-                                # Try to get currency symbol
-                                currency_element = page.query_selector('.andes-money-amount__currency-symbol')
-                                currency = currency_element.inner_text().strip() if currency_element else '$'
-                                result['price'] = f"{currency}{price_value}"
-                                break
-                    else:
-                        price_element = page.query_selector(selector)
-                        if price_element:
-                            price_text = price_element.inner_text().strip()
-
-                            # Try to get currency symbol
-                            currency_element = page.query_selector('.andes-money-amount__currency-symbol')
-                            if currency_element:
-                                currency = currency_element.inner_text().strip()
-                                result['price'] = f"{currency}{price_text}"
-                            else:
-                                # Check if price already has currency symbol
-                                if not any(symbol in price_text for symbol in ['$', '€', '£', 'USD', 'MXN', 'ARS']):
-                                    result['price'] = f"${price_text}"
-                                else:
-                                    result['price'] = price_text
-                            break
-
-            except Exception as e:
-                print(f"Error extracting price: {e}")
-
-            # Extract main image URL
-            try:
-                image_selectors = [
-                    'figure.ui-pdp-gallery__figure img',
-                    '.ui-pdp-image',
-                    'img.ui-pdp-gallery__figure__image',
-                    '.ui-pdp-gallery__figure img[src]',
-                    'figure img[data-zoom]',
-                    '.gallery-image img',
-                    'img[class*="gallery"]'
-                ]
-
-                for selector in image_selectors:
-                    image_element = page.query_selector(selector)
-                    if image_element:
-                        # Try different attributes
-                        img_url = (image_element.get_attribute('src') or
-                                 image_element.get_attribute('data-src') or
-                                 image_element.get_attribute('data-zoom'))
-
-                        if img_url and not img_url.startswith('data:'):
-                            result['image_url'] = img_url
-                            break
-
-            except Exception as e:
-                print(f"Error extracting image: {e}")
+async def scrape_product_page_within_budget(context: BrowserContext, url: str) -> dict:
+    """
+    Runs scrape_product_page, giving up after PAGE_BUDGET_SECONDS.
 
+    The navigation timeout alone does not bound the selector wait and
+    extraction, so one slow page could otherwise hold up a whole batch.
+
+    Args:
+        context: Browser context to open the page in
+        url: The MercadoLibre product URL
+
+    Returns:
+        Dictionary containing title, price, and image_url, all None if the
+        budget ran out
+    """
+    try:
+        return await asyncio.wait_for(scrape_product_page(context, url), PAGE_BUDGET_SECONDS)
+    except asyncio.TimeoutError:
+        log.error("MercadoLibre page took longer than %ss: %s", PAGE_BUDGET_SECONDS, url)
+        return {
+            'title': None,
+            'price': None,
+            'image_url': None
+        }
+
+
+async def scrape_product_page(context: BrowserContext, url: str) -> dict:
+    """
+    Opens a MercadoLibre product page in a context and extracts its data.
+
+    The page is closed afterwards; the context is left open.
+
+    Args:
+        context: Browser context to open the page in, with
+            PRODUCT_INIT_SCRIPT added
+        url: The MercadoLibre product URL
+
+    Returns:
+        Dictionary containing title, price, and image_url
+    """
+    result = {
+        'title': None,
+        'price': None,
+        'image_url': None
+    }
+
+    page = await context.new_page()
+    await page.route("**/*", block_unneeded_resources)
+
+    try:
+        # Navigate to the product page
+        log.info("Loading MercadoLibre page: %s", url)
+        await page.goto(url, wait_until='domcontentloaded', timeout=15000)
+
+        # Wait only until the title or price is in the DOM; ad requests keep
+        # the page from ever going network-idle
+        try:
+            await page.wait_for_selector(PRODUCT_READY_SELECTOR, timeout=8000)
         except PlaywrightTimeout:
-            print("Error: MercadoLibre page load timeout. Please check the URL and try again.")
+            log.warning("MercadoLibre product details did not appear, extracting what is available")
+
+        log.info("MercadoLibre page loaded successfully")
+
+        # Extract title, price and image URL in a single round trip
+        try:
+            data = await page.evaluate(
+                EXTRACT_PRODUCT_JS,
+                [TITLE_SELECTOR, PRICE_SELECTOR, PRICE_META_SELECTOR,
+                 CURRENCY_SELECTOR, IMAGE_SELECTOR]
+            )
+            result['title'] = data['title']
+            result['price'] = format_price(data['price'], data['price_meta'], data['currency'])
+            result['image_url'] = data['image_url']
+
         except Exception as e:
-            print(f"Error loading MercadoLibre page: {e}")
-        finally:
-            context.close()
-            browser.close()
+            log.error("Error extracting MercadoLibre product data: %s", e)
+
+    except PlaywrightTimeout:
+        log.error("MercadoLibre page load timeout. Please check the URL and try again.")
+    except Exception as e:
+        log.error("Error loading MercadoLibre page: %s", e)
+    finally:
+        await page.close()
 
     return result
 
 
-def search_mercadolibre(product_title: str, region: str = 'mx', debug: bool = False) -> str:
+def format_price(price_text: Optional[str], price_meta: Optional[str], currency: Optional[str]) -> Optional[str]:
+    """
+    Builds the display price from the values read off a product page.
+
+    Args:
+        price_text: Text of the visible price element, if any
+        price_meta: Content of the itemprop="price" meta tag, if any
+        currency: Text of the currency symbol element, if any
+
+    Returns:
+        The price prefixed with its currency symbol, or None if not found
+    """
+    if price_text:
+        if currency:
+            return f"{currency}{price_text}"
+        # Check if price already has currency symbol
+        if CURRENCY_IN_PRICE.search(price_text):
+            return price_text
+        return f"${price_text}"
+
+    if price_meta:
+        return f"{currency or '$'}{price_meta}"
+
+    return None
+
+
+async def search_mercadolibre(
+    product_title: str,
+    region: str = 'mx',
+    debug: bool = False,
+    context: Optional[BrowserContext] = None
+) -> str:
     """
     Searches for a product on MercadoLibre and returns the URL of the first result.
 
+    Found URLs are cached for SEARCH_CACHE_TTL seconds per region and title.
+
     Args:
         product_title: The product title to search for
         region: MercadoLibre region (mx, ar, co, br). Defaults to 'mx'
-        debug: If True, saves screenshots and prints extra debug info
+        debug: If True, saves screenshots and the page HTML for debugging
+        context: Browser context to open the page in. It is used as is,
+            so it should be opened with SEARCH_CONTEXT_OPTIONS and
+            SEARCH_INIT_SCRIPT. A new context is opened (and closed) if
+            omitted.
+
+    Returns:
+        URL of the first search result, or empty string if not found
+    """
+    key = (region, product_title)
+
+    # Debug runs always search, for the screenshots and saved HTML
+    if not debug:
+        cached_url = _search_cache.get(key)
+        if cached_url:
+            log.debug("Using cached MercadoLibre search result: %s", cached_url)
+            return cached_url
+
+    if context is not None:
+        result_url = await search_results_page(context, product_title, region, debug)
+    else:
+        async with new_context(
+            init_script=SEARCH_INIT_SCRIPT,
+            **with_storage_state(SEARCH_CONTEXT_OPTIONS, region)
+        ) as context:
+            result_url = await search_results_page(context, product_title, region, debug)
+            if result_url:
+                await save_storage_state(context, region)
+
+    # Only found products are cached; an empty result may be a bot check
+    if result_url:
+        _search_cache[key] = result_url
+
+    return result_url
+
+
+async def search_results_page(
+    context: BrowserContext,
+    product_title: str,
+    region: str,
+    debug: bool
+) -> str:
+    """
+    Opens a MercadoLibre search in a context and returns the first result URL.
+
+    The page is closed afterwards; the context is left open.
+
+    Args:
+        context: Browser context to open the page in, with
+            SEARCH_INIT_SCRIPT added
+        product_title: The product title to search for
+        region: MercadoLibre region (mx, ar, co, br)
+        debug: If True, saves screenshots and the page HTML for debugging
 
     Returns:
         URL of the first search result, or empty string if not found
@@ -215,106 +694,69 @@ def search_mercadolibre(product_title: str, region: str = 'mx', debug: bool = Fa
 
     base_url = region_urls.get(region, region_urls['mx'])
 
-    with sync_playwright() as p:
-        # Launch browser with anti-detection settings
-        browser = p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-setuid-sandbox',
-            ]
-        )
+    page = await context.new_page()
+    await page.route("**/*", block_unneeded_resources)
 
-        # Create context with realistic settings
-        context = browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-            locale='es-ES',
-        )
-
-        page = context.new_page()
+    try:
+        # Build search URL
+        import urllib.parse
+        search_query = urllib.parse.quote(product_title)
+        search_url = f"{base_url}/jm/search?as_word={search_query}"
 
-        # Hide webdriver detection
-        page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
+        log.debug("Searching MercadoLibre (%s) for: '%s'", region, product_title)
+        log.debug("Search URL: %s", search_url)
 
+        await page.goto(search_url, wait_until='domcontentloaded', timeout=10000)
+        log.debug("Page loaded, waiting for content...")
         try:
-            # Build search URL
-            import urllib.parse
-            search_query = urllib.parse.quote(product_title)
-            search_url = f"{base_url}/jm/search?as_word={search_query}"
-
-            print(f"[DEBUG] Searching MercadoLibre ({region}) for: '{product_title}'")
-            print(f"[DEBUG] Search URL: {search_url}")
-
-            page.goto(search_url, wait_until='domcontentloaded', timeout=20000)
-            print(f"[DEBUG] Page loaded, waiting for content...")
-            page.wait_for_timeout(3000)
-
-            # Take screenshot for debugging
+            await page.wait_for_selector(SEARCH_READY_SELECTOR, timeout=8000)
+        except PlaywrightTimeout:
+            log.debug("No search results appeared")
+
+        # Take screenshot for debugging
+        if debug:
+            await page.screenshot(path=f'debug_mercadolibre_search_{region}.png')
+            log.debug("Screenshot saved: debug_mercadolibre_search_%s.png", region)
+
+        # Check page title to see if we got blocked
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Page title: %s", await page.title())
+
+        # Find first product result: read the hrefs of every candidate link
+        # in one call and keep the first with a product ID
+        hrefs = await page.eval_on_selector_all(
+            PRODUCT_LINK_SELECTOR,
+            "links => links.map(link => link.getAttribute('href'))"
+        )
+        log.debug("Found %d candidate links", len(hrefs))
+        for href in hrefs:
+            if href and '/ML' in href:
+                # MercadoLibre URLs usually contain product ID like MLM123456
+                result_url = QUERY_AND_FRAGMENT.sub('', href)  # Remove anchors and query params
+                log.info("Found MercadoLibre product: %s", result_url)
+                break
+
+        if not result_url:
+            log.warning("No MercadoLibre product found for: '%s'", product_title)
             if debug:
-                page.screenshot(path=f'debug_mercadolibre_search_{region}.png')
-                print(f"[DEBUG] Screenshot saved: debug_mercadolibre_search_{region}.png")
-
-            # Check page title to see if we got blocked
-            page_title = page.title()
-            print(f"[DEBUG] Page title: {page_title}")
-
-            # Find first product result
-            # Try multiple selectors for product links
-            product_link_selectors = [
-                '.ui-search-layout__item a.ui-search-link',
-                '.ui-search-result__content a',
-                'a.ui-search-item__group__element',
-                '.ui-search-result a[href*="/ML"]',
-                'li.ui-search-layout__item a[href*="/ML"]',
-                '.ui-search-result__content-wrapper a'
-            ]
-
-            print(f"[DEBUG] Trying {len(product_link_selectors)} different selectors...")
-            for i, selector in enumerate(product_link_selectors):
-                print(f"[DEBUG] Trying selector {i+1}: {selector}")
-                link_element = page.query_selector(selector)
-                if link_element:
-                    href = link_element.get_attribute('href')
-                    if href and '/ML' in href:
-                        # MercadoLibre URLs usually contain product ID like MLM123456
-                        result_url = href.split('#')[0].split('?')[0]  # Remove anchors and query params
-                        print(f"[SUCCESS] Found MercadoLibre product with selector {i+1}: {result_url}")
-                        break
-                    else:
-                        print(f"[DEBUG] Selector {i+1} found link but no ML ID: {href if href else 'None'}")
-                else:
-                    print(f"[DEBUG] Selector {i+1} found no elements")
-
-            if not result_url:
-                print(f"[WARNING] No product found with any selector")
-                if debug:
-                    # Save HTML for debugging
-                    html_content = page.content()
-                    with open(f'debug_mercadolibre_search_{region}.html', 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    print(f"[DEBUG] HTML saved: debug_mercadolibre_search_{region}.html")
-
-        except PlaywrightTimeout as e:
-            print(f"[ERROR] MercadoLibre search timeout: {e}")
-            if debug and page:
-                try:
-                    page.screenshot(path=f'debug_mercadolibre_timeout_{region}.png')
-                    print(f"[DEBUG] Timeout screenshot saved")
-                except:
-                    pass
-        except Exception as e:
-            print(f"[ERROR] Error searching MercadoLibre: {e}")
-            import traceback
-            print(f"[DEBUG] Traceback: {traceback.format_exc()}")
-        finally:
-            context.close()
-            browser.close()
+                # Save HTML for debugging
+                html_content = await page.content()
+                with open(f'debug_mercadolibre_search_{region}.html', 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                log.debug("HTML saved: debug_mercadolibre_search_%s.html", region)
+
+    except PlaywrightTimeout as e:
+        log.error("MercadoLibre search timeout: %s", e)
+        if debug and page:
+            try:
+                await page.screenshot(path=f'debug_mercadolibre_timeout_{region}.png')
+                log.debug("Timeout screenshot saved")
+            except:
+                pass
+    except Exception as e:
+        # The traceback is only formatted when debug logging is on
+        log.error("Error searching MercadoLibre: %s", e, exc_info=log.isEnabledFor(logging.DEBUG))
+    finally:
+        await page.close()
 
     return result_url
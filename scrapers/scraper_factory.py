@@ -2,50 +2,79 @@
 Scraper Factory - Detects which store scraper to use based on URL.
 """
 
-from typing import Callable, Optional, List
-from urllib.parse import urlparse
+import re
+from typing import Awaitable, Callable, Optional, List
 from .amazon_scraper import scrape_amazon, search_amazon
-from .mercadolibre_scraper import scrape_mercadolibre, search_mercadolibre
+from .mercadolibre_scraper import scrape_mercadolibre, scrape_mercadolibre_batch, search_mercadolibre
 
 
-def get_scraper_function(url: str) -> Optional[Callable[[str], dict]]:
+# Store name found in the host part of a URL (between "://" and the first
+# "/", "?" or "#"), e.g. www.amazon.com.mx or articulo.mercadolibre.com.ar
+STORE_IN_HOST = re.compile(r'^[^:/?#]+://[^/?#]*?(amazon|mercadolibre)\.', re.IGNORECASE)
+
+# Store name found anywhere in a store name string
+STORE_IN_NAME = re.compile(r'amazon|mercadoli[bv]re', re.IGNORECASE)
+
+SCRAPERS = {
+    'amazon': scrape_amazon,
+    'mercadolibre': scrape_mercadolibre,
+    # Add more stores here in the future (and to STORE_IN_HOST):
+    # 'ebay': scrape_ebay,
+    # 'aliexpress': scrape_aliexpress,
+}
+
+# Stores whose scraper can share one browser context across many URLs
+BATCH_SCRAPERS = {
+    'mercadolibre': scrape_mercadolibre_batch,
+}
+
+SEARCHERS = {
+    'amazon': search_amazon,
+    'mercadolibre': search_mercadolibre,
+    'mercadolivre': search_mercadolibre,
+    # Add more stores here in the future (and to STORE_IN_NAME):
+    # 'ebay': search_ebay,
+}
+
+
+def get_scraper_function(url: str) -> Optional[Callable[[str], Awaitable[dict]]]:
     """
     Analyzes the URL and returns the appropriate scraper function.
 
+    The store is detected with a single regex match on the URL's host.
+
     Args:
         url: The product URL to scrape
 
     Returns:
-        A scraper function (callable) if the store is supported, None otherwise.
+        A scraper coroutine function if the store is supported, None otherwise.
     """
-    try:
-        # Parse the URL to get the domain
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.lower()
-
-        # Remove 'www.' prefix if present
-        if domain.startswith('www.'):
-            domain = domain[4:]
-
-        # Detect store based on domain
-        if 'amazon.com' in domain or 'amazon.' in domain:
-            return scrape_amazon
-        elif 'mercadolibre.com' in domain or 'mercadolibre.' in domain or 'mercadolibre.com.' in domain:
-            return scrape_mercadolibre
-
-        # Add more stores here in the future:
-        # elif 'ebay.com' in domain:
-        #     return scrape_ebay
-        # elif 'aliexpress.com' in domain:
-        #     return scrape_aliexpress
-
-        # Store not supported
+    match = STORE_IN_HOST.match(url)
+    if match is None:
         return None
 
-    except Exception as e:
-        print(f"Error parsing URL in scraper factory: {e}")
+    return SCRAPERS.get(match.group(1).lower())
+
+
+def get_batch_scraper_function(url: str) -> Optional[Callable[[List[str]], Awaitable[List[dict]]]]:
+    """
+    Returns the batch scraper for the URL's store, if it has one.
+
+    A batch scraper takes a list of product URLs of that store and returns
+    one result per URL, in order.
+
+    Args:
+        url: A product URL of the store
+
+    Returns:
+        A batch scraper coroutine function, or None if the store has none.
+    """
+    match = STORE_IN_HOST.match(url)
+    if match is None:
         return None
 
+    return BATCH_SCRAPERS.get(match.group(1).lower())
+
 
 def get_supported_stores() -> List[str]:
     """
@@ -63,7 +92,7 @@ def get_supported_stores() -> List[str]:
     ]
 
 
-def get_search_function(store_name: str) -> Optional[Callable[[str], str]]:
+def get_search_function(store_name: str) -> Optional[Callable[[str], Awaitable[str]]]:
     """
     Returns the appropriate search function for a given store name.
 
@@ -71,18 +100,11 @@ def get_search_function(store_name: str) -> Optional[Callable[[str], str]]:
         store_name: The name of the store (case-insensitive)
 
     Returns:
-        A search function that takes a product title and returns a product URL,
-        or None if the store is not supported.
+        A search coroutine function that takes a product title and returns a
+        product URL, or None if the store is not supported.
     """
-    store_lower = store_name.lower()
-
-    if 'amazon' in store_lower:
-        return search_amazon
-    elif 'mercadolibre' in store_lower or 'mercadolivre' in store_lower:
-        return search_mercadolibre
-
-    # Add more stores here in the future:
-    # elif 'ebay' in store_lower:
-    #     return search_ebay
+    match = STORE_IN_NAME.search(store_name)
+    if match is None:
+        return None
 
-    return None
+    return SEARCHERS.get(match.group(0).lower())
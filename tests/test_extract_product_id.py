@@ -0,0 +1,28 @@
+"""
+Tests for the product ID extraction and URL simplification in main.py
+"""
+
+import pytest
+
+from main import extract_product_id, simplify_url
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.amazon.com/dp/B07RJ18VMF",
+    "https://www.amazon.com/Some-Product-Name/dp/B07RJ18VMF?ref=abc",
+    "https://www.amazon.com/gp/product/B07RJ18VMF/ref=ppx_yo_dt_b",
+    "https://www.amazon.com/gp/aw/d/B07RJ18VMF",
+    "https://www.amazon.com/exec/obidos/ASIN/B07RJ18VMF/tag-20",
+])
+def test_amazon_url_forms(url):
+    assert extract_product_id(url) == "B07RJ18VMF"
+    assert simplify_url(url) == "https://www.amazon.com/dp/B07RJ18VMF"
+
+
+def test_mercadolibre_url():
+    url = "https://articulo.mercadolibre.com.mx/MLM-1234567890-producto-_JM"
+    assert extract_product_id(url) == "MLM-1234567890"
+
+
+def test_url_without_product_id():
+    assert extract_product_id("https://www.amazon.com/s?k=headphones") is None